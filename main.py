@@ -1,10 +1,20 @@
+import os
 import sys
 import platform
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
-from src.ui.main_window import MainWindow
+from src.utils import startup
+
+if "--startup-report" in sys.argv or os.environ.get("FANGKAN_STARTUP_REPORT"):
+    sys.argv = [a for a in sys.argv if a != "--startup-report"]
+    startup.enable()
+
 
 def main():
+    # Qt is imported here rather than at module level so the import cost
+    # shows up in the startup report and nothing else pays for it
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import Qt, QTimer
+    startup.mark("PyQt6 imported")
+
     # Enable High DPI scaling
     if hasattr(Qt.ApplicationAttribute, 'AA_EnableHighDpiScaling'):
         QApplication.setAttribute(Qt.ApplicationAttribute.AA_EnableHighDpiScaling, True)
@@ -20,14 +30,23 @@ def main():
             pass
 
     app = QApplication(sys.argv)
-    
+
     # Set application name
     app.setApplicationName("HouseSurveyAssistant")
     app.setOrganizationName("JhihHe")
-    
+    startup.mark("QApplication created")
+
+    from src.ui.main_window import MainWindow
+    startup.mark("main_window imported")
+
     window = MainWindow()
+    startup.mark("MainWindow constructed")
     window.show()
-    
+    startup.mark("window shown")
+    if startup.enabled():
+        # Queued after MainWindow.finish_startup, so the report covers it
+        QTimer.singleShot(0, lambda: (startup.mark("event loop started"), startup.report()))
+
     sys.exit(app.exec())
 
 if __name__ == "__main__":
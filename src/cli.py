@@ -0,0 +1,212 @@
+"""
+Headless entry point: python -m src.cli <command> ...
+
+    create  NAME...   create today's shoot folders and update the Excel sheet
+    excel   NAME...   only update today's Excel sheet
+    import            one-button card import (photo + VR lanes)
+
+Folder names come from the arguments, from --file, or from stdin (one per
+line). Everything is written to stdout as JSON lines, one object per event,
+ending with a {"event": "result", ...} line. Never imports PyQt6.
+"""
+import os
+import sys
+import json
+import argparse
+from src.utils.config import Config
+
+
+def emit(event, **fields):
+    fields = {"event": event, **fields}
+    sys.stdout.write(json.dumps(fields, ensure_ascii=False, default=str) + "\n")
+    sys.stdout.flush()
+
+
+def read_names(args):
+    if args.names:
+        lines = args.names
+    elif args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    else:
+        lines = sys.stdin.read().splitlines()
+    return [l.strip() for l in lines if l.strip()]
+
+
+def photographer(args):
+    return args.photographer if args.photographer is not None else Config.get_photographer_name()
+
+
+def cmd_create(args):
+    from src.services.folder_service import FolderService
+
+    names = read_names(args)
+    if not names:
+        emit("result", ok=False, errors=["请输入至少一个文件夹名称"])
+        return 2
+
+    total = {"steps": 0}
+
+    def callback(action, value):
+        if action == 'init':
+            total["steps"] = value
+        else:
+            emit("step", current=value, total=total["steps"])
+
+    success, errors, target_dirs, excel_info = FolderService.create_folders(
+        names, callback, photographer_name=photographer(args)
+    )
+    if success is None:
+        emit("result", ok=False, errors=errors, target_dirs=target_dirs)
+        return 1
+    emit(
+        "result", ok=not errors,
+        photo_created=success[target_dirs[0]],
+        vr_created=success[target_dirs[1]],
+        income=success[target_dirs[0]] * Config.PRICE_PER_SHOOT,
+        excel=excel_info,
+        errors=errors,
+        target_dirs=target_dirs,
+    )
+    # Folders may exist while some failed or the Excel update did not run
+    return 1 if errors else 0
+
+
+def cmd_excel(args):
+    from src.utils.fs_utils import copy_yesterday_excel_to_today, update_today_excel_from_folder_names
+
+    names = read_names(args)
+    if not names:
+        emit("result", ok=False, errors=["请输入至少一个文件夹名称"])
+        return 2
+    name = photographer(args)
+    copy_yesterday_excel_to_today(photographer_name=name)
+    added, skipped, msg = update_today_excel_from_folder_names(names, photographer_name=name)
+    emit("result", ok=not msg, added=added, skipped=skipped, error=msg)
+    return 1 if msg else 0
+
+
+def _lane_result(result):
+    logs, errors, moved, label, delete_failed, kind, duplicates, verify_info = result
+    return {
+        "label": label, "moved": moved, "duplicates": duplicates,
+        "delete_failed": delete_failed, "verify": verify_info,
+        "logs": logs, "errors": errors,
+    }
+
+
+async def _run_import(lanes, control):
+    import signal
+    import asyncio
+    from src.services.async_import import AsyncImportService
+
+    loop = asyncio.get_running_loop()
+
+    def first_interrupt():
+        # First Ctrl-C stops at the next chunk and the journal resumes from
+        # there; a second one aborts, e.g. a copy stuck on a hung card read
+        loop.remove_signal_handler(signal.SIGINT)
+        control.cancel()
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, first_interrupt)
+    except (NotImplementedError, RuntimeError):
+        pass
+
+    results = {}
+    async with AsyncImportService() as service:
+        async for event in service.stream(lanes):
+            if event.type == "bytes":
+                emit("progress", lane=event.lane, **event.data)
+            elif event.type == "file":
+                done, total, speed = event.data
+                emit("file", lane=event.lane, done=done, total=total, speed=speed)
+            elif event.type == "start":
+                emit("start", lane=event.lane, total_files=event.data)
+            elif event.type == "status":
+                emit("status", lane=event.lane, status=event.data)
+            elif event.type == "finished":
+                results[event.lane] = _lane_result(event.data)
+                emit("lane_done", lane=event.lane, **results[event.lane])
+    return results
+
+
+def cmd_import(args):
+    import asyncio
+    from src.utils.fs_utils import get_date_based_dirs
+    from src.services.async_import import card_import_lanes
+    from src.services.import_control import ImportControl
+    from src.services.throttle import BandwidthLimiter
+
+    photo_src = args.photo_src or Config.get_photo_src()
+    vr_src = args.vr_src or Config.get_vr_src()
+    if not os.path.exists(photo_src) and not os.path.exists(vr_src):
+        emit("result", ok=False, errors=[f"未检测到设备。相片源: {photo_src} VR源: {vr_src}"])
+        return 2
+
+    photo_dst, vr_dst = get_date_based_dirs(base_root=Config.get_root_dir(), mode='import')
+    options = {}
+    if args.verify is not None:
+        options["verify"] = args.verify
+    if args.snapshot:
+        options["snapshot"] = True
+
+    control = ImportControl()
+    lanes = card_import_lanes(
+        photo_src, vr_src, photo_dst, vr_dst,
+        control=control, limiter=BandwidthLimiter(Config.get_import_bandwidth()), **options
+    )
+    if args.lane != "all":
+        lanes = [lane for lane in lanes if lane["kind"] == args.lane]
+
+    try:
+        results = asyncio.run(_run_import(lanes, control))
+    except KeyboardInterrupt:
+        # Second Ctrl-C: leave without joining workers that may never return
+        emit("result", ok=False, cancelled=True, aborted=True, errors=["导入已强制中止"])
+        os._exit(130)
+    errors = [e for r in results.values() for e in r["errors"]]
+    emit(
+        "result", ok=not errors and not control.cancelled,
+        cancelled=control.cancelled,
+        moved=sum(r["moved"] for r in results.values()),
+        duplicates=sum(r["duplicates"] for r in results.values()),
+        errors=errors,
+    )
+    if control.cancelled:
+        return 130
+    return 1 if errors else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="房堪工作流助手 (无界面模式)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, func, help_text in (
+        ("create", cmd_create, "创建今日文件夹并更新 Excel"),
+        ("excel", cmd_excel, "仅更新今日 Excel"),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("names", nargs="*", help="文件夹名称 (留空则读取 --file 或标准输入)")
+        p.add_argument("--file", help="每行一个文件夹名称的文本文件")
+        p.add_argument("--photographer", help="摄影师姓名 (默认取设置)")
+        p.set_defaults(func=func)
+
+    p = sub.add_parser("import", help="一键导卡 (相片 + VR)")
+    p.add_argument("--photo-src", help="相片源目录 (默认自动检测)")
+    p.add_argument("--vr-src", help="VR 源目录 (默认自动检测)")
+    p.add_argument("--lane", choices=("all", "photo", "vr"), default="all")
+    p.add_argument("--verify", dest="verify", action="store_true", default=None, help="校验每个文件")
+    p.add_argument("--no-verify", dest="verify", action="store_false")
+    p.add_argument("--snapshot", action="store_true", help="源为本地暂存目录: 保留源文件，同盘时链接/克隆")
+    p.set_defaults(func=cmd_import)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import asyncio
+from functools import partial
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.config import Config
+from src.services.import_service import ImportTask, ImportLane
+from src.services.io_scheduler import IOScheduler
+from src.services.dedup_index import DedupIndex
+
+# One progress event of one lane (lane = the task's kind, 'photo' or 'vr'):
+#   'start'    data = total files
+#   'bytes'    data = TransferProgress snapshot dict, also fires mid-file
+#   'file'     data = (files done, total files, speed str)
+#   'status'   data = status text
+#   'finished' data = the lane's result tuple, as returned by ImportTask.run
+ImportEvent = namedtuple("ImportEvent", "lane type data")
+
+# Blocking file work runs on one pool shared by every lane; per-lane
+# concurrency is bounded by semaphores, not by pool size.
+DEFAULT_THREADS = 32
+
+
+def card_import_lanes(photo_src, vr_src, photo_dst, vr_dst, control=None, limiter=None, **options):
+    """
+    Task configs for the usual one-button import: photo and VR lanes into
+    the dated 原片 folders, sharing one IOScheduler and one DedupIndex.
+    Extra options (verify, snapshot, ...) are added to both lanes.
+    """
+    # Both lanes usually write to the same work root; the scheduler keeps
+    # them from thrashing any device they share.
+    scheduler = IOScheduler([
+        (photo_src, photo_dst, Config.get_import_workers(photo_src)),
+        (vr_src, vr_dst, Config.get_import_workers(vr_src)),
+    ], mode=Config.get("import_shared_device_mode", "adaptive"))
+
+    lanes = [
+        {"src": str(photo_src), "dst": str(photo_dst), "kind": "photo", "label": "相片"},
+        {"src": str(vr_src), "dst": str(vr_dst), "kind": "vr", "label": "VR"},
+    ]
+    index_root = str(Config.get_root_dir())
+    # One index object for both lanes: each save() rewrites the whole file
+    dedup_index = DedupIndex(index_root) if options.get("dedup", True) else None
+    for lane in lanes:
+        lane.update({
+            "index_root": index_root,
+            "dedup_index": dedup_index,
+            "control": control,
+            "scheduler": scheduler,
+            "limiter": limiter,
+        })
+        lane.update(options)
+    return lanes
+
+
+class AsyncImportService:
+    """
+    asyncio front end to the import pipeline. Lanes are coroutines on the
+    caller's event loop, and every blocking step (copy, verify, scan, and
+    the journal/index bookkeeping of finished files) goes to the shared
+    thread pool, so a lane costs no dedicated thread while it waits and
+    the loop itself never touches the disk.
+
+        async with AsyncImportService() as service:
+            async for event in service.stream([photo_config, vr_config]):
+                ...
+
+    Task configs take the same keys as ImportTask.run.
+    """
+
+    def __init__(self, max_threads=DEFAULT_THREADS):
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="import")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Cancelled (e.g. a second Ctrl-C): don't wait on a copy stuck in a
+        # hung card read
+        self.close(wait=exc_type is None)
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    async def _run(self, call):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def _bounded(self, slots, call):
+        async with slots:
+            return await self._run(call)
+
+    @staticmethod
+    def _callbacks(lane_name, emit):
+        loop = asyncio.get_running_loop()
+
+        def post(event_type):
+            def callback(*args):
+                data = args[0] if len(args) == 1 else args
+                # Byte progress fires on pool threads
+                loop.call_soon_threadsafe(emit, ImportEvent(lane_name, event_type, data))
+            return callback
+
+        return {
+            'on_start': post("start"),
+            'on_bytes_progress': post("bytes"),
+            'on_progress': post("file"),
+            'on_status_change': post("status"),
+        }
+
+    @staticmethod
+    def _handle_all(lane, finished):
+        # One pool hop per batch of finished stages; batches are awaited one
+        # at a time, so handle() calls never overlap
+        follow_ups = []
+        for (stage, job), future in finished:
+            follow_up = lane.handle(stage, job, future)
+            if follow_up is not None:
+                follow_ups.append((job, follow_up))
+        return follow_ups
+
+    async def run_lane(self, task_config, emit=None):
+        """
+        Run one lane to completion and return its result tuple. emit, if
+        given, is called on the event loop with every ImportEvent.
+        """
+        lane_name = task_config.get("kind", "photo")
+        task = ImportTask(self._callbacks(lane_name, emit) if emit else None)
+        lane = ImportLane(task, task_config)
+        pending = {}
+        try:
+            if await self._run(lane.prepare):
+                copy_slots = asyncio.Semaphore(lane.workers)
+                verify_slots = asyncio.Semaphore(lane.verify_workers)
+                # Destination listing, journal writes and dedup lookups stay
+                # off the loop, so a slow NAS on one lane never stalls the
+                # other lane's events
+                calls = await self._run(lambda: list(lane.copy_calls()))
+                for job, call in calls:
+                    pending[asyncio.ensure_future(self._bounded(copy_slots, call))] = ("copy", job)
+                while pending:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    finished = [(pending.pop(future), future) for future in done]
+                    follow_ups = await self._run(partial(self._handle_all, lane, finished))
+                    for job, follow_up in follow_ups:
+                        pending[asyncio.ensure_future(self._bounded(verify_slots, follow_up))] = ("verify", job)
+                await self._run(lane.complete)
+        except asyncio.CancelledError:
+            # Copies already on the pool stop at their next chunk
+            if lane.control is not None:
+                lane.control.cancel()
+            for future in pending:
+                future.cancel()
+            raise
+        except Exception as e:
+            lane.fail(e)
+        finally:
+            await self._run(lane.close)
+        return lane.result()
+
+    async def run(self, task_configs):
+        """Run lanes concurrently; results in task_configs order."""
+        return list(await asyncio.gather(*(self.run_lane(c) for c in task_configs)))
+
+    async def stream(self, task_configs):
+        """
+        Run lanes concurrently and yield their ImportEvents as they happen.
+        Every lane ends with a 'finished' event; the iterator ends after the
+        last one.
+        """
+        queue = asyncio.Queue()
+
+        async def run_one(task_config):
+            try:
+                result = await self.run_lane(task_config, queue.put_nowait)
+            except Exception as e:
+                # Still end the lane, or the iterator would wait forever
+                lane = ImportLane(ImportTask(), task_config)
+                lane.fail(e)
+                result = lane.result()
+            queue.put_nowait(ImportEvent(task_config.get("kind", "photo"), "finished", result))
+
+        runners = [asyncio.ensure_future(run_one(c)) for c in task_configs]
+        remaining = len(runners)
+        try:
+            while remaining:
+                event = await queue.get()
+                if event.type == "finished":
+                    remaining -= 1
+                yield event
+        finally:
+            for runner in runners:
+                runner.cancel()
+            await asyncio.gather(*runners, return_exceptions=True)
@@ -0,0 +1,167 @@
+import os
+import json
+import stat
+import hashlib
+import threading
+
+INDEX_FILENAME = ".fangkan_import_index.json"
+INDEX_VERSION = 1
+
+# The quick key only reads the head and tail of a file, so probing a fresh
+# card costs ~128 KiB per file. Full hashes are computed only when the quick
+# key collides, which is exactly the "same card imported twice" case.
+_SAMPLE = 64 * 1024
+_HASH_BLOCK = 1024 * 1024
+
+
+def quick_key(path, size=None):
+    if size is None:
+        size = os.path.getsize(path)
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(_SAMPLE))
+        if size > _SAMPLE:
+            f.seek(max(_SAMPLE, size - _SAMPLE))
+            h.update(f.read(_SAMPLE))
+    return f"{size}:{h.hexdigest()}"
+
+
+def full_hash(path):
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        while True:
+            buf = f.read(_HASH_BLOCK)
+            if not buf:
+                break
+            h.update(buf)
+    return h.hexdigest()
+
+
+class DedupIndex:
+    """
+    Persistent map of everything imported under one root, stored as
+    <root>/.fangkan_import_index.json:
+
+        {"version": 1, "entries": {quick_key: [{"path": rel, "hash": hex|null,
+                                                "size": int, "mtime": ns}]}}
+
+    Paths are relative to the root so the index survives the root being
+    remounted elsewhere (NAS shares). Entries whose file has gone away are
+    dropped when they are next looked at, and files changed in place since
+    they were indexed (XMP written into a JPEG, a trimmed clip) are keyed
+    and hashed again. Safe to use from pool workers; the lanes of one
+    import share a single instance, as each save() rewrites the file.
+    """
+
+    def __init__(self, root):
+        self.root = os.fspath(root)
+        self.path = os.path.join(self.root, INDEX_FILENAME)
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._entries = data.get("entries", {})
+        except Exception:
+            self._entries = {}
+
+    def save(self):
+        # Serialised, so a snapshot is never overwritten by an older one
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                text = json.dumps({"version": INDEX_VERSION, "entries": self._entries},
+                                  ensure_ascii=False, separators=(",", ":"))
+                self._dirty = False
+            tmp = self.path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, self.path)
+            except Exception:
+                pass
+
+    def find_duplicate(self, src_file, key):
+        """
+        Return the absolute path of an indexed file with byte-identical
+        content to src_file, or None.
+        """
+        with self._lock:
+            candidates = list(self._entries.get(key, ()))
+        if not candidates:
+            return None
+
+        src_hash = full_hash(src_file)
+        for cand in candidates:
+            abs_path = os.path.join(self.root, cand["path"])
+            try:
+                st = os.stat(abs_path)
+            except OSError:
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
+                self._forget(key, cand["path"])
+                continue
+            if cand.get("size") != st.st_size or cand.get("mtime") != st.st_mtime_ns:
+                # Changed since it was indexed: the cached hash, and maybe
+                # the key, no longer describe it
+                self._forget(key, cand["path"])
+                try:
+                    current_key = quick_key(abs_path, st.st_size)
+                except OSError:
+                    continue
+                cand = self._add_entry(current_key, cand["path"], None, st)
+                if current_key != key:
+                    continue
+            cand_hash = cand.get("hash")
+            if cand_hash is None:
+                cand_hash = full_hash(abs_path)
+                try:
+                    after = os.stat(abs_path)
+                except OSError:
+                    continue
+                if (after.st_size, after.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+                    # Written to while we hashed it; don't trust either way
+                    continue
+                with self._lock:
+                    cand["hash"] = cand_hash
+                    self._dirty = True
+            if cand_hash == src_hash:
+                return abs_path
+        return None
+
+    def _forget(self, key, rel_path):
+        with self._lock:
+            remaining = [c for c in self._entries.get(key, ()) if c["path"] != rel_path]
+            if remaining:
+                self._entries[key] = remaining
+            else:
+                self._entries.pop(key, None)
+            self._dirty = True
+
+    def _add_entry(self, key, rel, content_hash, st):
+        with self._lock:
+            bucket = self._entries.setdefault(key, [])
+            for cand in bucket:
+                if cand["path"] == rel:
+                    return cand
+            cand = {"path": rel, "hash": content_hash, "size": st.st_size, "mtime": st.st_mtime_ns}
+            bucket.append(cand)
+            self._dirty = True
+            return cand
+
+    def add(self, dst_file, key, content_hash=None):
+        """Index dst_file as committed, with its final times already set."""
+        try:
+            rel = os.path.relpath(dst_file, self.root)
+            st = os.stat(dst_file)
+        except (ValueError, OSError):
+            # Different drive than the root (Windows), or already gone
+            return
+        self._add_entry(key, rel, content_hash, st)
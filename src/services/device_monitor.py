@@ -0,0 +1,222 @@
+import os
+import sys
+import select
+import threading
+import platform
+from pathlib import Path
+from src.utils.config import Config
+from src.utils.volume_index import mount_signature
+from src.services.device_registry import DeviceRegistry, mount_root
+from src.services.exif_header import CAMERA_EXTS, read_camera_info
+
+# Safety-net rescan even when the platform reports mount changes, in case a
+# notification is missed (e.g. a watcher that could not be set up again).
+EVENT_RESCAN_INTERVAL = 30.0
+# Rescan period where no mount notification is available.
+POLL_INTERVAL = 2.0
+# Longest single wait, so stop() is honoured promptly.
+_WAIT_SLICE = 1.0
+
+
+def device_name(path_str):
+    """
+    Display name for the card holding path_str: the volume label, or the
+    camera model from EXIF when the label is generic ("Untitled").
+    Touches the card, so only call it off the UI thread.
+    """
+    if not path_str or not os.path.exists(path_str):
+        return ""
+
+    drive_name = ""
+
+    # 1. 尝试获取卷标
+    if platform.system() == 'Windows':
+        drive = os.path.splitdrive(path_str)[0]
+        if drive:
+            try:
+                import win32api
+                vol_info = win32api.GetVolumeInformation(drive + "\\")
+                if vol_info[0]:
+                    drive_name = vol_info[0]
+            except Exception:
+                pass
+            if not drive_name:
+                drive_name = drive
+    elif platform.system() == 'Darwin':
+        if path_str.startswith('/Volumes/'):
+            parts = Path(path_str).parts
+            if len(parts) >= 3:
+                drive_name = parts[2]
+    elif platform.system() == 'Linux':
+        # udisks and most automount rules name the mount point after the label
+        try:
+            drive_name = os.path.basename(mount_root(path_str))
+        except OSError:
+            pass
+
+    # 2. 如果卷标是 Untitled 或为空，尝试读取 EXIF
+    is_generic = not drive_name or drive_name.lower() in ['untitled', 'no name', 'disk']
+
+    if is_generic:
+        # 只扫描顶层，且只读文件头，避免太慢
+        try:
+            entries = sorted(os.scandir(path_str), key=lambda e: e.name)
+        except OSError:
+            entries = []
+        for entry in entries:
+            if os.path.splitext(entry.name)[1].lower() not in CAMERA_EXTS:
+                continue
+            info = read_camera_info(entry.path)
+            if info is not None and info.model:
+                return f"[{info.model}]"
+
+    return f"[{drive_name}]" if drive_name else ""
+
+
+class _MountinfoWaiter:
+    """Linux: /proc/self/mountinfo raises POLLPRI when the mount table changes."""
+
+    def __init__(self):
+        self._file = open("/proc/self/mountinfo", "rb")
+        self._file.read()
+        self._poll = select.poll()
+        self._poll.register(self._file.fileno(), select.POLLPRI | select.POLLERR)
+
+    def wait(self, timeout):
+        if not self._poll.poll(timeout * 1000):
+            return False
+        # Re-read to re-arm the notification
+        self._file.seek(0)
+        self._file.read()
+        return True
+
+    def close(self):
+        self._file.close()
+
+
+class _KqueueWaiter:
+    """macOS: mount points appear and disappear as entries of /Volumes."""
+
+    def __init__(self, path="/Volumes"):
+        self._fd = os.open(path, os.O_RDONLY)
+        self._kq = select.kqueue()
+        self._event = select.kevent(
+            self._fd, filter=select.KQ_FILTER_VNODE,
+            flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+            fflags=select.KQ_NOTE_WRITE | select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME,
+        )
+
+    def wait(self, timeout):
+        return bool(self._kq.control([self._event], 1, timeout))
+
+    def close(self):
+        self._kq.close()
+        os.close(self._fd)
+
+
+def _make_waiter():
+    try:
+        if sys.platform.startswith("linux") and hasattr(select, "poll"):
+            return _MountinfoWaiter()
+        if sys.platform == "darwin" and hasattr(select, "kqueue"):
+            return _KqueueWaiter()
+    except OSError:
+        pass
+    return None
+
+
+def probe_sources(registry=None, on_resolved=None):
+    """
+    Device status for both lanes:
+    {"photo": {"path", "online", "name"}, "vr": {...}}
+    With a DeviceRegistry, names come from its cache and are "" until the
+    registry has resolved them (on_resolved is then called).
+    """
+    status = {}
+    for kind, src in (("photo", Config.get_photo_src()), ("vr", Config.get_vr_src())):
+        path = str(src)
+        online = os.path.exists(path)
+        name = ""
+        if online:
+            if registry is None:
+                name = device_name(path)
+            else:
+                name = registry.lookup(path, on_resolved) or ""
+        status[kind] = {"path": path, "online": online, "name": name}
+    return status
+
+
+class DeviceMonitor(threading.Thread):
+    """
+    Watches for cards being inserted or removed and reports photo/VR source
+    status through on_change(status) (see probe_sources), called from this
+    thread and only when the status actually changed. All filesystem work
+    (volume scans, EXIF) happens here, never on the caller's thread.
+
+    Mount changes are picked up through /proc/self/mountinfo (Linux) or a
+    kqueue on /Volumes (macOS); elsewhere the mount table is compared every
+    POLL_INTERVAL seconds. Card names go through a DeviceRegistry, so the
+    card is read for EXIF once per insertion, on the registry's worker.
+    """
+
+    def __init__(self, on_change):
+        super().__init__(name="device-monitor", daemon=True)
+        self.on_change = on_change
+        self._stop_event = threading.Event()
+        self._refresh = threading.Event()
+        self._status = None
+        self.registry = DeviceRegistry(device_name)
+
+    def refresh(self):
+        """Re-probe soon even without a mount change (e.g. paths edited)."""
+        self._refresh.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._refresh.set()
+
+    def _probe(self):
+        try:
+            status = probe_sources(self.registry, on_resolved=self.refresh)
+        except Exception:
+            return
+        if status != self._status:
+            self._status = status
+            self.on_change(status)
+
+    def run(self):
+        waiter = _make_waiter()
+        interval = EVENT_RESCAN_INTERVAL if waiter is not None else POLL_INTERVAL
+        signature = mount_signature()
+        self._probe()
+        idle = 0.0
+        try:
+            while not self._stop_event.is_set():
+                slice_ = min(_WAIT_SLICE, interval)
+                if waiter is not None:
+                    changed = waiter.wait(slice_)
+                else:
+                    changed = False
+                    self._refresh.wait(slice_)
+                idle += slice_
+                if self._stop_event.is_set():
+                    break
+                if self._refresh.is_set():
+                    self._refresh.clear()
+                    changed = True
+                if not changed and idle >= interval:
+                    new_signature = mount_signature()
+                    # Without any signature, fall back to probing the paths
+                    changed = new_signature != signature or new_signature is None
+                    signature = new_signature
+                if changed:
+                    idle = 0.0
+                    signature = mount_signature()
+                    self.registry.prune()
+                    self._probe()
+                elif idle >= interval:
+                    idle = 0.0
+        finally:
+            if waiter is not None:
+                waiter.close()
+            self.registry.close()
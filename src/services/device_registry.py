@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.volume_index import linux_mounts
+
+
+def mount_root(path):
+    """Top directory of the filesystem holding path."""
+    path = os.path.abspath(os.fspath(path))
+    dev = os.stat(path).st_dev
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return path
+        try:
+            if os.stat(parent).st_dev != dev:
+                return path
+        except OSError:
+            return path
+        path = parent
+
+
+def _linux_uuid(devno):
+    by_uuid = "/dev/disk/by-uuid"
+    try:
+        names = os.listdir(by_uuid)
+    except OSError:
+        return None
+    for name in names:
+        try:
+            st = os.stat(os.path.join(by_uuid, name))
+        except OSError:
+            continue
+        if f"{os.major(st.st_rdev)}:{os.minor(st.st_rdev)}" == devno:
+            return name
+    return None
+
+
+def volume_key(path):
+    """
+    Identity of the mounted volume holding path, for one mount: the same
+    card keeps its key until it is unmounted, and gets a new one when it
+    is mounted again.
+
+    Linux:   (filesystem UUID or st_dev, mount id from mountinfo)
+    Windows: (volume serial number, drive)
+    other:   (st_dev, ctime of the volume root)
+    """
+    root = mount_root(path)
+    st = os.stat(root)
+    if sys.platform.startswith("linux"):
+        info = linux_mounts().get(root)
+        if info is not None:
+            mount_id, devno = info[0], info[1]
+            return (_linux_uuid(devno) or st.st_dev, mount_id)
+    elif sys.platform == "win32":
+        drive = os.path.splitdrive(root)[0]
+        try:
+            import win32api
+            return (win32api.GetVolumeInformation(drive + "\\")[1], drive)
+        except Exception:
+            pass
+    return (st.st_dev, st.st_ctime_ns)
+
+
+class DeviceRegistry:
+    """
+    Volume -> display name cache (see device_monitor.device_name). Names
+    that need the card to be read (EXIF of the first image when the label
+    is "Untitled") are resolved once per mount on a worker thread; lookups
+    never block on the card. prune() drops volumes that are no longer
+    mounted, so a reinserted card is identified afresh.
+    """
+
+    def __init__(self, resolver):
+        self._resolver = resolver
+        self._names = {}      # key -> name
+        self._roots = {}      # key -> mount root, to notice unmounts
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="device-identity")
+
+    def lookup(self, path, on_resolved=None):
+        """
+        Cached name for the volume holding path, or None while it is being
+        resolved; on_resolved() is called once the name is available.
+        """
+        try:
+            key = volume_key(path)
+            root = mount_root(path)
+        except OSError:
+            return None
+        with self._lock:
+            if key in self._names:
+                return self._names[key]
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        self._executor.submit(self._resolve, key, root, path, on_resolved)
+        return None
+
+    def _resolve(self, key, root, path, on_resolved):
+        try:
+            name = self._resolver(path)
+        except Exception:
+            name = ""
+        with self._lock:
+            self._pending.discard(key)
+            self._names[key] = name
+            self._roots[key] = root
+        if on_resolved is not None:
+            on_resolved()
+
+    def prune(self):
+        """Forget volumes that have been unmounted (or remounted)."""
+        with self._lock:
+            entries = list(self._roots.items())
+        gone = []
+        for key, root in entries:
+            try:
+                if volume_key(root) != key:
+                    gone.append(key)
+            except OSError:
+                gone.append(key)
+        with self._lock:
+            for key in gone:
+                self._names.pop(key, None)
+                self._roots.pop(key, None)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
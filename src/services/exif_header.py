@@ -0,0 +1,269 @@
+"""
+Camera identity (make, model, serial number) straight from the file header,
+without decoding the image: the TIFF IFDs of JPEG (APP1 Exif), ARW, DNG and
+other TIFF-based raws, and the trailer Insta360 cameras append to .insv
+videos. Only HEAD_BYTES are read up front, plus a few small reads when a
+tag value lies further in, so a 60 MB RAW costs the same as a thumbnail.
+Standard library only; cheap to import from the import pipeline.
+
+    python -m src.services.exif_header FILE_OR_DIR...   benchmark against PIL
+"""
+import os
+import sys
+import time
+import struct
+from collections import namedtuple
+
+CameraInfo = namedtuple("CameraInfo", "make model serial")
+
+HEAD_BYTES = 64 * 1024
+# Files worth opening to identify a camera
+CAMERA_EXTS = {".jpg", ".jpeg", ".arw", ".dng", ".nef", ".cr2", ".orf", ".rw2", ".tif", ".tiff", ".insp", ".insv"}
+
+_MAKE = 0x010F
+_MODEL = 0x0110
+_EXIF_IFD = 0x8769
+_BODY_SERIAL = 0xA431
+_DNG_SERIAL = 0xC62F
+_ASCII = 2
+_LONG = 4
+_IFD = 13
+# 42 for TIFF proper; Olympus ORF and Panasonic RW2 use their own
+_TIFF_MAGICS = (42, 0x4F52, 0x5352, 0x55)
+_MAX_ENTRIES = 1024
+_MAX_STRING = 256
+_MAX_SEGMENTS = 64
+
+# Insta360 trailer: [records...][32 bytes][size u32][version u32][magic]
+# with each record stored as [data][format u8][id u8][size u32]
+_INSTA_MAGIC = b"8db42d694ccc418790edff439fe026bf"
+_INSTA_FOOTER = 72
+_INSTA_METADATA = 1
+_INSTA_MAX_RECORD = 64 * 1024
+_INSTA_MAX_RECORDS = 32
+
+
+class _Reader:
+    """Random access over an open file, served from the header when possible."""
+
+    def __init__(self, f):
+        self._f = f
+        self.head = f.read(HEAD_BYTES)
+
+    def read(self, offset, size):
+        end = offset + size
+        if end <= len(self.head):
+            return self.head[offset:end]
+        self._f.seek(offset)
+        return self._f.read(size)
+
+
+def _text(data):
+    text = data.split(b"\0", 1)[0].decode("utf-8", "replace").strip()
+    text = "".join(c for c in text if c.isprintable())
+    return text or None
+
+
+def _read_ifd(reader, base, order, offset, wanted):
+    """{tag: value} for the wanted tags of one IFD; ASCII and single LONGs only."""
+    values = {}
+    raw = reader.read(base + offset, 2)
+    if len(raw) < 2:
+        return values
+    count = min(struct.unpack(order + "H", raw)[0], _MAX_ENTRIES)
+    entries = reader.read(base + offset + 2, count * 12)
+    for i in range(0, len(entries) - 11, 12):
+        tag, type_, n, value = struct.unpack(order + "HHI4s", entries[i:i + 12])
+        if tag not in wanted:
+            continue
+        if type_ == _ASCII:
+            n = min(n, _MAX_STRING)
+            if n > 4:
+                value = reader.read(base + struct.unpack(order + "I", value)[0], n)
+            values[tag] = _text(value[:n])
+        elif type_ in (_LONG, _IFD) and n == 1:
+            values[tag] = struct.unpack(order + "I", value)[0]
+    return values
+
+
+def _parse_tiff(reader, base):
+    header = reader.read(base, 8)
+    if len(header) < 8:
+        return None
+    order = {b"II": "<", b"MM": ">"}.get(header[:2])
+    if order is None:
+        return None
+    magic, ifd0 = struct.unpack(order + "HI", header[2:8])
+    if magic not in _TIFF_MAGICS:
+        return None
+    tags = _read_ifd(reader, base, order, ifd0, (_MAKE, _MODEL, _EXIF_IFD, _DNG_SERIAL))
+    serial = tags.get(_DNG_SERIAL)
+    if serial is None and tags.get(_EXIF_IFD):
+        serial = _read_ifd(reader, base, order, tags[_EXIF_IFD], (_BODY_SERIAL,)).get(_BODY_SERIAL)
+    return CameraInfo(tags.get(_MAKE), tags.get(_MODEL), serial)
+
+
+def _jpeg_exif_offset(reader):
+    """Offset of the TIFF header inside the APP1 Exif segment, or None."""
+    pos = 2
+    for _ in range(_MAX_SEGMENTS):
+        marker = reader.read(pos, 10)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF:
+            # Fill byte before the marker
+            pos += 1
+            continue
+        if marker[1] in (0xD9, 0xDA):
+            # End of image / start of scan: no Exif ahead of the image data
+            return None
+        if marker[1] == 0xE1 and marker[4:10] == b"Exif\0\0":
+            return pos + 10
+        pos += 2 + struct.unpack(">H", marker[2:4])[0]
+    return None
+
+
+def _protobuf_strings(data, wanted):
+    """Top-level length-delimited fields of a protobuf message, by number."""
+    found = {}
+    pos = 0
+
+    def varint():
+        nonlocal pos
+        result = shift = 0
+        while pos < len(data):
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return result
+            shift += 7
+        raise ValueError("truncated varint")
+
+    try:
+        while pos < len(data) and len(found) < len(wanted):
+            key = varint()
+            field, wire = key >> 3, key & 7
+            if wire == 0:
+                varint()
+            elif wire == 1:
+                pos += 8
+            elif wire == 5:
+                pos += 4
+            elif wire == 2:
+                length = varint()
+                if field in wanted:
+                    found[field] = _text(data[pos:pos + length])
+                pos += length
+            else:
+                break
+    except ValueError:
+        pass
+    return found
+
+
+def _parse_insta360(f, size):
+    """Serial number and camera type from an Insta360 trailer, or None."""
+    if size < _INSTA_FOOTER:
+        return None
+    f.seek(size - _INSTA_FOOTER)
+    footer = f.read(_INSTA_FOOTER)
+    if footer[-32:] != _INSTA_MAGIC:
+        return None
+    trailer_size = struct.unpack("<I", footer[32:36])[0]
+    offset = _INSTA_FOOTER
+    for _ in range(_INSTA_MAX_RECORDS):
+        if offset + 6 > min(trailer_size, size):
+            return None
+        f.seek(size - offset - 6)
+        record_format, record_id, record_size = struct.unpack("<BBI", f.read(6))
+        if record_id == _INSTA_METADATA and record_size <= _INSTA_MAX_RECORD:
+            f.seek(size - offset - 6 - record_size)
+            fields = _protobuf_strings(f.read(record_size), (1, 2))
+            return CameraInfo("Insta360", fields.get(2), fields.get(1))
+        offset += 6 + record_size
+    return None
+
+
+def read_camera_info(path):
+    """
+    CameraInfo(make, model, serial) for a photo/raw/video file; fields the
+    file does not carry are None. Returns None for unsupported or
+    unreadable files.
+    """
+    try:
+        with open(path, "rb") as f:
+            reader = _Reader(f)
+            head = reader.head
+            if head[:2] == b"\xff\xd8":
+                base = _jpeg_exif_offset(reader)
+                return _parse_tiff(reader, base) if base is not None else None
+            if head[:2] in (b"II", b"MM"):
+                return _parse_tiff(reader, 0)
+            if head[4:8] == b"ftyp":
+                return _parse_insta360(f, os.fstat(f.fileno()).st_size)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def _pil_model(path):
+    # The full-decoder path that device naming used before
+    from PIL import Image
+    from PIL.ExifTags import TAGS
+    img = Image.open(path)
+    for tag_id, value in img.getexif().items():
+        if TAGS.get(tag_id, tag_id) == 'Model':
+            return "".join(c for c in str(value).strip() if c.isprintable())
+    return None
+
+
+def benchmark(paths, rounds=5, stream=None):
+    """Time read_camera_info against PIL on each file and print the results."""
+    stream = stream or sys.stdout
+    try:
+        import PIL  # noqa: F401
+        have_pil = True
+    except ImportError:
+        have_pil = False
+        stream.write("PIL not installed; timing the header reader only\n")
+
+    stream.write(f"{'header ms':>10} {'PIL ms':>10}  model / file\n")
+    for path in paths:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            info = read_camera_info(path)
+        header_ms = (time.perf_counter() - start) * 1000 / rounds
+        model = info.model if info else None
+
+        pil_column = "-"
+        if have_pil:
+            try:
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    pil_model = _pil_model(path)
+                pil_column = f"{(time.perf_counter() - start) * 1000 / rounds:.3f}"
+                if pil_model != model:
+                    model = f"{model} (PIL: {pil_model})"
+            except Exception as e:
+                pil_column = type(e).__name__
+        stream.write(f"{header_ms:10.3f} {pil_column:>10}  {model} / {os.path.basename(path)}\n")
+
+
+def _expand(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for entry in sorted(os.scandir(path), key=lambda e: e.name):
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in CAMERA_EXTS:
+                    yield entry.path
+        else:
+            yield path
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m src.services.exif_header")
+    parser.add_argument("paths", nargs="+", help="files, or directories to take camera files from")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    benchmark(list(_expand(args.paths)), rounds=args.rounds)
@@ -13,7 +13,7 @@ class FolderService:
             try:
                 os.makedirs(d, exist_ok=True)
             except OSError as e:
-                return None, [f"无法创建目录 {d}: {e}"], target_dirs
+                return None, [f"无法创建目录 {d}: {e}"], target_dirs, {}
 
         copy_yesterday_excel_to_today(photographer_name=photographer_name)
         excel_added, excel_skipped, excel_msg = update_today_excel_from_folder_names(folder_names, photographer_name=photographer_name)
@@ -0,0 +1,47 @@
+import threading
+
+
+class ImportCancelled(Exception):
+    """Raised at a checkpoint once the import has been cancelled."""
+
+
+class ImportControl:
+    """
+    Cooperative cancel/pause token shared by every lane of an import.
+
+    Copy workers call checkpoint() between files and after every chunk, so a
+    multi-GB clip stops (or holds) within one block instead of running to the
+    end. Cancelled copies leave no partial behind and the journal keeps the
+    rest, so the next import resumes where this one stopped.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set() and not self.cancelled
+
+    def cancel(self):
+        self._cancelled.set()
+        # Wake paused workers so they can notice the cancellation
+        self._running.set()
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def checkpoint(self):
+        """Block while paused; raise ImportCancelled once cancelled."""
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise ImportCancelled()
@@ -1,8 +1,39 @@
 import os
-import shutil
-import time
 import errno
-from src.utils.fs_utils import resolve_conflict
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.utils.config import Config
+from src.utils.fs_utils import ConflictResolver
+from src.services.transfer import (
+    copy_file, partial_path, commit_partial, cleanup_partials, kernel_copy_available, SameVolumePlacer
+)
+from src.services.progress import TransferProgress, format_speed
+from src.services.manifest import card_folders, scan_sources
+from src.services.dedup_index import DedupIndex, quick_key
+from src.services.verify import verify_copy
+from src.services.metadata import MetadataStage
+from src.services.journal import ImportJournal
+from src.services.import_control import ImportCancelled
+from src.services.io_scheduler import IOScheduler
+
+
+class _ImportJob:
+    """Per-file state shared between the copy and verify stages."""
+
+    __slots__ = ("entry", "dst_file", "copied", "key", "duplicate_of", "placed", "source_removed", "content_hash", "meta", "read_back")
+
+    def __init__(self, entry, dst_file):
+        self.entry = entry
+        self.dst_file = dst_file
+        self.copied = 0
+        self.key = None
+        self.duplicate_of = None
+        self.placed = None
+        self.source_removed = False
+        self.content_hash = None
+        self.meta = None
+        self.read_back = False
+
 
 class ImportTask:
     def __init__(self, callbacks=None):
@@ -10,6 +41,7 @@ class ImportTask:
         callbacks: dict with optional keys:
             - on_start(total_files)
             - on_progress(current_index, total_files, speed_str)
+            - on_bytes_progress(snapshot)  # see TransferProgress, also fires mid-file
             - on_error(error_msg)
             - on_log(log_msg)
             - on_status_change(status_text)
@@ -20,111 +52,459 @@ class ImportTask:
         if name in self.callbacks:
             self.callbacks[name](*args)
 
+    @staticmethod
+    def _remove_source(keep_source, src_file):
+        if keep_source:
+            return False
+        try:
+            os.remove(src_file)
+        except Exception:
+            return False
+        return True
+
+    @classmethod
+    def _transfer_one(cls, keep_source, job, placer, backend, block_size, on_bytes, metadata, dedup, verify, journal, control, gates):
+        """
+        Copy stage, runs on a pool worker and fills in `job`. When verify is
+        on, the VR source is left for the verify stage to remove. `placer`
+        is the lane's SameVolumePlacer when src and dst share a volume.
+        `gates` are the shared-device slots (see IOScheduler) held for the
+        whole file.
+        """
+        if control is not None:
+            control.checkpoint()
+        with IOScheduler.slot(gates):
+            return cls._transfer_locked(keep_source, job, placer, backend, block_size, on_bytes, metadata, dedup, verify, journal)
+
+    @classmethod
+    def _transfer_locked(cls, keep_source, job, placer, backend, block_size, on_bytes, metadata, dedup, verify, journal):
+        entry = job.entry
+        if dedup is not None:
+            job.key = quick_key(entry.path, entry.size)
+            job.duplicate_of = dedup.find_duplicate(entry.path, job.key)
+            if job.duplicate_of:
+                job.source_removed = cls._remove_source(keep_source, entry.path)
+                return job
+
+        if journal is not None:
+            journal.started(entry, job.dst_file)
+
+        if placer is not None:
+            # A clone is a new inode and needs the source's metadata
+            op = placer.place(
+                entry.path, job.dst_file,
+                before_commit=lambda tmp: metadata.stamp(tmp, metadata.capture(entry.path)),
+            )
+            if op:
+                # A rename, link or clone moves no data, so there is
+                # nothing to verify either
+                job.placed = op
+                job.source_removed = op == "move" or cls._remove_source(keep_source, entry.path)
+                on_bytes(entry.size)
+                return job
+
+        # Data goes into a hidden partial and only appears under its real
+        # name once complete (and verified), so culling software watching
+        # the folder never picks up a half-written file.
+        # Read before the source can go; stamped on the partial right
+        # before it gets its real name (after verification, if any)
+        job.meta = metadata.capture(entry.path)
+        tmp_file = partial_path(job.dst_file)
+        try:
+            copy_file(entry.path, tmp_file, backend, block_size, on_bytes)
+            if not verify:
+                metadata.stamp(tmp_file, job.meta)
+                commit_partial(tmp_file, job.dst_file)
+        except BaseException:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            raise
+        if not verify:
+            job.source_removed = cls._remove_source(keep_source, entry.path)
+        return job
+
+    @classmethod
+    def _verify_one(cls, keep_source, job, metadata, control):
+        """
+        Verify stage, runs on its own pool so hashing overlaps with the next
+        copies. The partial is committed only once the hashes match; a bad
+        copy is deleted and the source kept.
+        """
+        tmp_file = partial_path(job.dst_file)
+        committed = False
+        try:
+            if control is not None:
+                control.checkpoint()
+            ok, content_hash, job.read_back = verify_copy(job.entry.path, tmp_file)
+            if ok:
+                metadata.stamp(tmp_file, job.meta)
+                commit_partial(tmp_file, job.dst_file)
+                committed = True
+        finally:
+            if not committed:
+                try:
+                    os.remove(tmp_file)
+                except OSError:
+                    pass
+        if not ok:
+            return False
+        job.content_hash = content_hash
+        job.source_removed = cls._remove_source(keep_source, job.entry.path)
+        return True
+
     def run(self, task_config):
-        src_dir = task_config["src"]
-        dst_dir = task_config["dst"]
-        kind = task_config.get("kind", "photo")
-        label = task_config.get("label", kind)
-        
-        logs = []
-        errors = []
-        moved_count = 0
-        delete_fail_count = 0
-        permission_issue_reported = False
+        """
+        task_config keys: src, dst, kind ('photo' | 'vr'), label,
+        all_folders (optional, default True: also ingest sibling DCIM
+        folders such as 101CANON, 102CANON next to src),
+        workers (optional, defaults to Config.get_import_workers(src)),
+        transfer (optional, one of transfer.BACKENDS, default 'auto'),
+        dedup (optional, default True: skip files already imported
+        byte-for-byte under index_root),
+        index_root (optional, where the dedup index lives, default dst),
+        dedup_index (optional DedupIndex shared with the other lanes; lanes
+        writing to the same index_root must share one, or the last lane to
+        save drops the others' entries),
+        verify (optional, checksum every copy before counting it / deleting
+        the source, defaults to the import_verify setting),
+        journal (optional, default True: keep a resumable journal beside
+        dst so an interrupted import continues where it stopped),
+        control (optional ImportControl to pause/cancel the import),
+        same_volume (optional, one of transfer.SAME_VOLUME_POLICIES used
+        when src and dst share a volume, defaults to
+        Config.get_same_volume_policy(kind)),
+        metadata (optional, one of metadata.METADATA_POLICIES, what is
+        carried over besides the data, defaults to
+        Config.get_metadata_policy(kind)),
+        snapshot (optional, default False: src is a local staging copy;
+        every lane keeps its source and same-volume files are reflinked or
+        hardlinked into dst instead of copied, see the 'clone' policy),
+        scheduler (optional IOScheduler shared with the other lanes, limits
+        concurrency on devices both lanes use),
+        limiter (optional BandwidthLimiter shared with the other lanes,
+        caps copy throughput for this lane and for all lanes together),
+        block_size (optional, bytes for the 'stream' backend, defaults to
+        Config.get_import_block_size()).
+
+        Returns (logs, errors, moved_count, label, delete_fail_count, kind,
+        duplicate_count, verify_info) where verify_info is
+        {"enabled": bool, "verified": int, "failed": int, "cached": int};
+        "cached" counts verified files whose copy could only be read back
+        through the page cache (see verify._hash_destination).
+        """
+        lane = ImportLane(self, task_config)
+        try:
+            if lane.prepare():
+                with ThreadPoolExecutor(max_workers=lane.workers) as executor, \
+                        ThreadPoolExecutor(max_workers=lane.verify_workers) as verifier:
+                    pending = {executor.submit(call): ("copy", job) for job, call in lane.copy_calls()}
+                    # Results of both stages are consumed here, in completion
+                    # order, so progress is reported monotonically from one thread.
+                    while pending:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            stage, job = pending.pop(future)
+                            follow_up = lane.handle(stage, job, future)
+                            if follow_up is not None:
+                                pending[verifier.submit(follow_up)] = ("verify", job)
+                lane.complete()
+        except Exception as e:
+            lane.fail(e)
+        finally:
+            lane.close()
+        return lane.result()
+
+
+class ImportLane:
+    """
+    One lane of an import (photo or VR) split into steps, so the same
+    pipeline can be driven by ImportTask.run with its own thread pools or
+    by AsyncImportService from an event loop:
+
+        prepare()     checks, scan, journal resume; False when nothing to copy
+        copy_calls()  (job, call) pairs; each call runs the copy stage
+        handle()      consumes a finished stage, may return a verify call
+        complete()    after the last result
+        fail(e)       on an unexpected exception
+        close()       always; saves the index, closes the journal
+
+    Every step does blocking I/O (handle() writes the journal and the
+    dedup index) and belongs on a worker thread. handle() calls must never
+    overlap; they need not come from the same thread.
+    """
+
+    def __init__(self, task, task_config):
+        self.task = task
+        self.config = task_config
+        self.src_dir = task_config["src"]
+        self.dst_dir = task_config["dst"]
+        self.kind = task_config.get("kind", "photo")
+        self.label = task_config.get("label", self.kind)
+        self.verify = bool(task_config.get("verify", Config.get("import_verify", False)))
+        self.control = task_config.get("control")
+        self.snapshot = bool(task_config.get("snapshot", False))
+        # Cards on the photo lane and staging folders are never emptied
+        self.keep_source = self.kind == "photo" or self.snapshot
+
+        self.logs = []
+        self.errors = []
+        self.moved_count = 0
+        self.delete_fail_count = 0
+        self.duplicate_count = 0
+        self.linked_count = 0
+        self.verify_info = {"enabled": self.verify, "verified": 0, "failed": 0, "cached": 0}
+        self.permission_issue_reported = False
+
+        self.manifest = []
+        self.workers = 1
+        self.dedup = None
+        self.journal = None
+        self.metadata = None
+        self.finished = False
+        self._started = False
+        self._done_count = 0
+
+    def _call(self, name, *args):
+        self.task._call(name, *args)
+
+    def result(self):
+        return (self.logs, self.errors, self.moved_count, self.label, self.delete_fail_count,
+                self.kind, self.duplicate_count, self.verify_info)
+
+    @property
+    def verify_workers(self):
+        return self.workers if self.verify else 1
+
+    def prepare(self):
+        src_dir, dst_dir, label, kind = self.src_dir, self.dst_dir, self.label, self.kind
+        logs = self.logs
 
         if not os.path.exists(src_dir):
             logs.append(f"⚠️ {label}: 源目录不存在 (未插入存储卡?)")
             self._call('on_status_change', "未检测到设备")
-            return (logs, errors, moved_count, label, delete_fail_count, kind)
-            
+            return False
+
+        os.makedirs(dst_dir, exist_ok=True)
+
+        # Test actual write permission by creating a temporary file
         try:
-            os.makedirs(dst_dir, exist_ok=True)
-            
-            # Test actual write permission by creating a temporary file
-            try:
-                test_file = os.path.join(dst_dir, '.perm_test')
-                with open(test_file, 'w') as f:
-                    f.write('test')
-                os.remove(test_file)
-            except Exception as e:
-                logs.append(f"❌ 目标目录无法写入文件 (测试失败): {dst_dir}")
-                errors.append(f"写入测试失败: {str(e)}")
-                self._call('on_status_change', "无写入权限")
-                return (logs, errors, moved_count, label, delete_fail_count, kind)
-            
-            if not os.access(src_dir, os.R_OK):
-                logs.append(f"❌ 源目录不可读: {src_dir}")
-                self._call('on_status_change', "无读取权限")
-                return (logs, errors, moved_count, label, delete_fail_count, kind)
-
-            files = [f for f in os.listdir(src_dir) if not f.startswith('.')]
-            
-            if not files:
-                logs.append(f"ℹ️ {label}: 源目录为空")
-                self._call('on_status_change', "无文件")
-                return (logs, errors, moved_count, label, delete_fail_count, kind)
-            
-            logs.append(f"🚀 开始移动 {label}...")
-            total_files = len(files)
-            self._call('on_start', total_files)
-            
-            try:
-                same_device = (os.stat(src_dir).st_dev == os.stat(dst_dir).st_dev)
-            except Exception:
-                same_device = False
-
-            for idx, filename in enumerate(files):
-                src_file = os.path.join(src_dir, filename)
-                dst_file = resolve_conflict(dst_dir, filename)
-                
-                speed_str = "0.0 MB/s"
-                if os.path.isfile(src_file):
-                    try:
-                        file_size = os.path.getsize(src_file)
-                        if kind == "photo":
-                            t0 = time.perf_counter()
-                            try:
-                                shutil.copy2(src_file, dst_file)
-                            except PermissionError:
-                                # Fallback to copy if copy2 (metadata) fails
-                                shutil.copy(src_file, dst_file)
-                            dt = time.perf_counter() - t0
-                            moved_count += 1
-                            speed_mbps = (file_size / (1024 * 1024)) / dt if dt > 0 else 0.0
-                            speed_str = f"{speed_mbps:.1f} MB/s"
-                        else:
-                            if same_device:
-                                shutil.move(src_file, dst_file)
-                                moved_count += 1
-                                speed_str = "0.0 MB/s"
-                            else:
-                                t0 = time.perf_counter()
-                                try:
-                                    shutil.copy2(src_file, dst_file)
-                                except PermissionError:
-                                    shutil.copy(src_file, dst_file)
-                                dt = time.perf_counter() - t0
-                                moved_count += 1
-                                speed_mbps = (file_size / (1024 * 1024)) / dt if dt > 0 else 0.0
-                                speed_str = f"{speed_mbps:.1f} MB/s"
-                                try:
-                                    os.remove(src_file)
-                                except Exception:
-                                    delete_fail_count += 1
-                                    errors.append(f"{label}: {filename} 已复制，但原卡文件未删除")
-                        
-                        self._call('on_progress', idx + 1, total_files, speed_str)
-                        
-                    except Exception as e:
-                        if isinstance(e, PermissionError) or getattr(e, "errno", None) in (errno.EPERM, errno.EACCES, 1, 13):
-                            if not permission_issue_reported:
-                                errors.append(f"权限不足: 无法读写文件。请检查是否有磁盘访问权限。\n源: {src_file}\n目标: {dst_file}")
-                                permission_issue_reported = True
-                            self._call('on_status_change', "权限不足")
-                        else:
-                            errors.append(f"{kind} 文件处理失败 {filename}: {str(e)}")
-                            
+            test_file = os.path.join(dst_dir, '.perm_test')
+            with open(test_file, 'w') as f:
+                f.write('test')
+            os.remove(test_file)
+        except Exception as e:
+            logs.append(f"❌ 目标目录无法写入文件 (测试失败): {dst_dir}")
+            self.errors.append(f"写入测试失败: {str(e)}")
+            self._call('on_status_change', "无写入权限")
+            return False
+
+        if not os.access(src_dir, os.R_OK):
+            logs.append(f"❌ 源目录不可读: {src_dir}")
+            self._call('on_status_change', "无读取权限")
+            return False
+
+        stale = cleanup_partials(dst_dir)
+        if stale:
+            logs.append(f"🧹 {label}: 已清理上次中断留下的临时文件 {stale} 个")
+
+        if self.config.get("all_folders", True):
+            src_dirs = card_folders(src_dir)
+        else:
+            src_dirs = [src_dir]
+        src_dirs = [d for d in src_dirs if os.access(d, os.R_OK)]
+        if len(src_dirs) > 1:
+            names = ", ".join(os.path.basename(d) for d in src_dirs)
+            logs.append(f"📂 {label}: 共 {len(src_dirs)} 个文件夹 ({names})")
+
+        # Single scandir pass per folder: names, sizes and kinds for everything
+        manifest = scan_sources(src_dirs)
+
+        if not manifest:
+            logs.append(f"ℹ️ {label}: 源目录为空")
+            self._call('on_status_change', "无文件")
+            return False
+
+        if self.config.get("journal", True):
+            journal = self.journal = ImportJournal(dst_dir, kind, os.path.dirname(os.path.normpath(src_dir)))
+            remaining = []
+            for entry in manifest:
+                if journal.is_completed(entry):
+                    # A VR source left behind by a failed delete goes now
+                    ImportTask._remove_source(self.keep_source, entry.path)
+                    continue
+                leftover = journal.interrupted_destination(entry)
+                if leftover and os.path.exists(leftover):
+                    # Truncated by the previous run; copy again under the same name
+                    os.remove(leftover)
+                remaining.append(entry)
+            resumed = len(manifest) - len(remaining)
+            manifest = remaining
+            if resumed:
+                logs.append(f"↩️ {label}: 续传，跳过上次已完成的 {resumed} 个文件")
+            if not manifest:
+                self.finished = True
+                self._call('on_status_change', "已全部导入")
+                return False
+            journal.plan(manifest)
+
+        logs.append(f"🚀 开始移动 {label}...")
+        self.manifest = manifest
+        self._call('on_start', len(manifest))
+
+        try:
+            same_device = (os.stat(src_dir).st_dev == os.stat(dst_dir).st_dev)
+        except Exception:
+            same_device = False
+
+        self.placer = None
+        if same_device:
+            policy = self.config.get("same_volume") or ("clone" if self.snapshot else Config.get_same_volume_policy(kind))
+            self.placer = SameVolumePlacer(policy, keeps_source=self.keep_source)
+
+        self.workers = self.config.get("workers") or Config.get_import_workers(src_dir)
+        self.backend = self.config.get("transfer", "auto")
+        self.block_size = self.config.get("block_size") or Config.get_import_block_size()
+        self.metadata = MetadataStage(self.config.get("metadata") or Config.get_metadata_policy(kind))
+        if self.config.get("dedup", True):
+            self.dedup = self.config.get("dedup_index") or DedupIndex(self.config.get("index_root") or dst_dir)
+        scheduler = self.config.get("scheduler")
+        self.gates = scheduler.gates_for(src_dir, dst_dir) if scheduler is not None else []
+        self.limiter = self.config.get("limiter")
+        if self.limiter is not None and self.limiter.limited(kind) and self.backend == "auto" and not kernel_copy_available():
+            # shutil reports a whole file at once; chunked copies let the
+            # cap smooth traffic instead of pausing between files
+            self.backend = "stream"
+
+        self.progress = TransferProgress(
+            len(manifest),
+            sum(entry.size for entry in manifest),
+            on_update=lambda snap: self._call('on_bytes_progress', snap),
+        )
+        self._started = True
+        return True
+
+    def _byte_counter(self, job):
+        progress, gates, limiter, control, kind = self.progress, self.gates, self.limiter, self.control, self.kind
+
+        def on_bytes(n):
+            job.copied += n
+            progress.add_bytes(n)
+            for gate in gates:
+                gate.record(n)
+            if limiter is not None and not job.placed:
+                limiter.consume(kind, n, control)
+            if control is not None:
+                # Chunk boundary: hold here while paused, bail out on cancel
+                control.checkpoint()
+        return on_bytes
+
+    def copy_calls(self):
+        # Destinations are resolved up front on this thread, from one
+        # listing of dst, so two workers can never pick the same "_N" suffix.
+        resolver = ConflictResolver(self.dst_dir)
+        for entry in self.manifest:
+            job = _ImportJob(entry, resolver.resolve(entry.name))
+            yield job, partial(
+                ImportTask._transfer_one, self.keep_source, job, self.placer,
+                self.backend, self.block_size, self._byte_counter(job), self.metadata,
+                self.dedup, self.verify, self.journal, self.control, self.gates
+            )
+
+    def _settle(self, job):
+        self.progress.file_done(job.entry.size, job.copied)
+        speed_str = format_speed(self.progress.snapshot()["rate"])
+        self._call('on_progress', self._done_count, len(self.manifest), speed_str)
+
+    def handle(self, stage, job, future):
+        """
+        Consume a finished copy or verify stage. Returns the verify-stage
+        call when the copy still has to be checked, otherwise None.
+        """
+        label, kind = self.label, self.kind
+        filename = job.entry.name
+        try:
+            verified = future.result()
+        except ImportCancelled:
+            # Not an error: the journal picks this file up next time
+            self.progress.file_cancelled(job.entry.size, job.copied)
+            return None
         except Exception as e:
-            errors.append(f"{label} 任务异常: {str(e)}")
-            
-        return (logs, errors, moved_count, label, delete_fail_count, kind)
+            self._done_count += 1
+            self._settle(job)
+            if isinstance(e, PermissionError) or getattr(e, "errno", None) in (errno.EPERM, errno.EACCES, 1, 13):
+                if not self.permission_issue_reported:
+                    self.errors.append(f"权限不足: 无法读写文件。请检查是否有磁盘访问权限。\n源: {job.entry.path}\n目标: {job.dst_file}")
+                    self.permission_issue_reported = True
+                self._call('on_status_change', "权限不足")
+            else:
+                self.errors.append(f"{kind} 文件处理失败 {filename}: {str(e)}")
+            return None
+
+        if stage == "copy" and self.verify and not job.duplicate_of and not job.placed:
+            return partial(ImportTask._verify_one, self.keep_source, job, self.metadata, self.control)
+
+        self._done_count += 1
+        if stage == "verify":
+            if not verified:
+                self.verify_info["failed"] += 1
+                self.errors.append(f"{label}: {filename} 校验失败，已删除目标文件并保留原卡文件")
+                self._settle(job)
+                return None
+            self.verify_info["verified"] += 1
+            if not job.read_back:
+                self.verify_info["cached"] += 1
+
+        if not self.keep_source and not job.source_removed:
+            self.delete_fail_count += 1
+            self.errors.append(f"{label}: {filename} 已复制，但原卡文件未删除")
+
+        if self.journal is not None:
+            self.journal.done(job.entry, job.duplicate_of or job.dst_file)
+
+        if job.duplicate_of:
+            self.duplicate_count += 1
+            # Nothing was copied: take the file out of the byte plan
+            self._settle(job)
+            return None
+
+        self.moved_count += 1
+        if job.placed in ("hardlink", "reflink"):
+            self.linked_count += 1
+        if self.dedup is not None:
+            self.dedup.add(job.dst_file, job.key, job.content_hash)
+        self._settle(job)
+        return None
+
+    def complete(self):
+        cancelled = self.control is not None and self.control.cancelled
+        if cancelled:
+            self.logs.append(f"⏹️ {self.label}: 导入已取消，下次导入将从中断处继续")
+            self._call('on_status_change', "已取消")
+        self.finished = not self.errors and not cancelled
+
+    def fail(self, e):
+        self.errors.append(f"{self.label} 任务异常: {str(e)}")
+
+    def close(self):
+        if self.dedup is not None:
+            self.dedup.save()
+        if self.journal is not None:
+            self.journal.close(self.finished)
+        if not self._started:
+            return
+
+        label, logs = self.label, self.logs
+        if self.metadata.failed:
+            # Data is complete; only times/attributes are missing
+            logs.append(f"⚠️ {label}: {len(self.metadata.failed)} 个文件的时间/属性未能保留 (数据已完整导入)")
+        if self.linked_count:
+            logs.append(f"🔗 {label}: {self.linked_count} 个文件以链接/克隆方式导入，未复制数据")
+        if self.duplicate_count:
+            logs.append(f"⏭️ {label}: 跳过重复文件 {self.duplicate_count} 个")
+        if self.verify:
+            logs.append(f"🔐 {label}: 校验通过 {self.verify_info['verified']} 个，失败 {self.verify_info['failed']} 个")
+            if self.verify_info["cached"]:
+                # Only proves the bytes handed to the OS, not what reached the disk
+                logs.append(f"⚠️ {label}: {self.verify_info['cached']} 个文件无法绕过系统缓存回读，仅为缓存级校验")
@@ -0,0 +1,141 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+# How to treat a device that more than one import lane reads from or writes to:
+#   'adaptive' -> shared concurrency limit, tuned by measured throughput
+#   'serial'   -> one file at a time on that device across all lanes
+#   'off'      -> no coordination (every lane runs its full worker pool)
+MODES = ("adaptive", "serial", "off")
+
+# Throughput is sampled over this window before the limit is nudged.
+_WINDOW = 2.0
+# Changes smaller than this fraction are treated as noise.
+_TOLERANCE = 0.05
+
+
+def device_of(path):
+    """st_dev of path, or of its nearest existing parent (dst may not exist yet)."""
+    path = os.path.abspath(os.fspath(path))
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+
+class DeviceGate:
+    """
+    Concurrency limit for one physical device shared by several lanes.
+
+    In adaptive mode the limit hill-climbs between 1 and max_limit: each
+    window's throughput is compared with the previous one, a drop reverses
+    the direction, and any noticeable change moves the limit one step that
+    way. A steady rate leaves it where it is.
+    """
+
+    def __init__(self, device, limit, max_limit, adaptive):
+        self.device = device
+        self.limit = max(1, limit)
+        self.max_limit = max(self.limit, max_limit)
+        self.adaptive = adaptive
+        self.active = 0
+        self._cond = threading.Condition()
+        self._bytes = 0
+        self._window_start = time.monotonic()
+        self._last_rate = None
+        self._direction = -1
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def record(self, n):
+        if not self.adaptive:
+            return
+        with self._cond:
+            self._bytes += n
+            now = time.monotonic()
+            dt = now - self._window_start
+            if dt < _WINDOW:
+                return
+            rate = self._bytes / dt
+            if self._last_rate is not None:
+                if rate < self._last_rate * (1 - _TOLERANCE):
+                    self._direction = -self._direction
+                if abs(rate - self._last_rate) > self._last_rate * _TOLERANCE:
+                    new_limit = min(self.max_limit, max(1, self.limit + self._direction))
+                    if new_limit > self.limit:
+                        self._cond.notify_all()
+                    self.limit = new_limit
+            self._last_rate = rate
+            self._bytes = 0
+            self._window_start = now
+
+
+class IOScheduler:
+    """
+    Coordinates the lanes of one import (photo + VR). Devices are identified
+    by st_dev, the same way is_same_device does; only devices used by more
+    than one lane get a gate, so a card reader that only the photo lane
+    touches runs at that lane's full worker count.
+
+    lanes: list of (src_dir, dst_dir, workers)
+    """
+
+    def __init__(self, lanes, mode="adaptive"):
+        self.mode = mode if mode in MODES else "adaptive"
+        self._gates = {}
+        if self.mode == "off":
+            return
+
+        users = {}
+        for src_dir, dst_dir, workers in lanes:
+            if not os.path.exists(src_dir):
+                # No card in this lane, so it won't compete for anything
+                continue
+            for dev in {device_of(src_dir), device_of(dst_dir)}:
+                if dev is not None:
+                    users.setdefault(dev, []).append(workers)
+
+        for dev, lane_workers in users.items():
+            if len(lane_workers) < 2:
+                continue
+            if self.mode == "serial":
+                self._gates[dev] = DeviceGate(dev, 1, 1, adaptive=False)
+            else:
+                # Start at one lane's worth of requests, allow up to all of them
+                self._gates[dev] = DeviceGate(dev, max(lane_workers), sum(lane_workers), adaptive=True)
+
+    @property
+    def shared_devices(self):
+        return list(self._gates)
+
+    def gates_for(self, src_dir, dst_dir):
+        devs = {device_of(src_dir), device_of(dst_dir)}
+        # Fixed acquisition order so two lanes can never deadlock
+        return [self._gates[d] for d in sorted(d for d in devs if d in self._gates)]
+
+    @staticmethod
+    @contextmanager
+    def slot(gates):
+        acquired = []
+        try:
+            for gate in gates:
+                gate.acquire()
+                acquired.append(gate)
+            yield
+        finally:
+            for gate in reversed(acquired):
+                gate.release()
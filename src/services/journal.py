@@ -0,0 +1,107 @@
+import os
+import json
+import threading
+
+# Record types, one compact JSON array per line:
+#   ["P", key, size, mtime]   planned
+#   ["S", key, dst]           copy started (destination may be partial)
+#   ["D", key, dst]           completed (after verification, if enabled)
+PLANNED, STARTED, DONE = "P", "S", "D"
+
+
+class ImportJournal:
+    """
+    Write-ahead journal for one import session, stored beside the destination
+    directory as .<dst name>.<kind>.journal. Records are appended and flushed
+    (not fsynced) per file, which keeps the cost to one small write; a line
+    torn by a crash is simply ignored on the next load.
+
+    Keys are paths relative to the folder holding the card folders (e.g.
+    "100CANON/IMG_0001.JPG"), so a card that remounts as "Untitled 1" still
+    resumes.
+    """
+
+    def __init__(self, dst_dir, kind, source_base):
+        parent, name = os.path.split(os.path.normpath(os.fspath(dst_dir)))
+        self.path = os.path.join(parent, f".{name}.{kind}.journal")
+        self.source_base = os.fspath(source_base)
+        self._planned = {}
+        self._started = {}
+        self._done = {}
+        self._fh = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            op, key = rec[0], rec[1]
+            if op == PLANNED:
+                self._planned[key] = (rec[2], rec[3])
+            elif op == STARTED:
+                self._started[key] = rec[2]
+            elif op == DONE:
+                self._done[key] = rec[2]
+                self._started.pop(key, None)
+
+    def key_for(self, entry):
+        return os.path.relpath(entry.path, self.source_base).replace(os.sep, "/")
+
+    def is_completed(self, entry):
+        """Finished in an earlier run, unchanged on the card and still on disk."""
+        key = self.key_for(entry)
+        dst = self._done.get(key)
+        if dst is None or self._planned.get(key) != (entry.size, entry.mtime):
+            return False
+        return os.path.exists(dst)
+
+    def interrupted_destination(self, entry):
+        """
+        Destination of a copy of `entry` that started but never completed.
+        Only meaningful while the source is still on the card; a finished
+        move whose D record was lost has no source left to ask about.
+        """
+        return self._started.get(self.key_for(entry))
+
+    def _append(self, *records):
+        data = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records)
+        with self._lock:
+            if self._fh is None:
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(data)
+            self._fh.flush()
+
+    def plan(self, entries):
+        records = []
+        for entry in entries:
+            key = self.key_for(entry)
+            self._planned[key] = (entry.size, entry.mtime)
+            records.append([PLANNED, key, entry.size, entry.mtime])
+        if records:
+            self._append(*records)
+
+    def started(self, entry, dst_file):
+        self._append([STARTED, self.key_for(entry), dst_file])
+
+    def done(self, entry, dst_file):
+        self._append([DONE, self.key_for(entry), dst_file])
+
+    def close(self, finished):
+        """finished=True removes the journal: nothing is left to resume."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+        if finished:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
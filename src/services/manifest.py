@@ -0,0 +1,91 @@
+import os
+import re
+from collections import namedtuple
+
+# One file planned for import. `kind` is a coarse media class derived from
+# the extension: 'image', 'raw', 'video' or 'other' (sidecars, thumbnails...).
+ManifestEntry = namedtuple("ManifestEntry", "name path size mtime kind")
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".heic", ".heif", ".png", ".tif", ".tiff"}
+RAW_EXTS = {".arw", ".cr2", ".cr3", ".nef", ".raf", ".orf", ".rw2", ".dng", ".x3f", ".x3i", ".insp"}
+VIDEO_EXTS = {".mp4", ".mov", ".insv", ".360", ".lrv", ".mts", ".avi"}
+
+
+def media_kind(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in RAW_EXTS:
+        return "raw"
+    if ext in IMAGE_EXTS:
+        return "image"
+    if ext in VIDEO_EXTS:
+        return "video"
+    return "other"
+
+
+def scan_directory(src_dir):
+    """
+    Build the import manifest for one directory in a single os.scandir pass.
+    Hidden entries and anything that isn't a regular file are skipped. On
+    POSIX this costs one stat per file; on Windows the directory listing
+    already carries size/mtime, so it costs none.
+    """
+    manifest = []
+    with os.scandir(src_dir) as it:
+        for entry in it:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            manifest.append(ManifestEntry(
+                entry.name, entry.path, st.st_size, st.st_mtime, media_kind(entry.name)
+            ))
+    manifest.sort(key=lambda e: e.name)
+    return manifest
+
+
+def _sibling_pattern(folder_name):
+    # 100CANON -> \d+CANON, Camera01 -> Camera\d+, CAM_001 -> CAM_\d+
+    parts = re.split(r"(\d+)", folder_name)
+    regex = "".join(r"\d+" if p.isdigit() else re.escape(p) for p in parts if p)
+    return re.compile(rf"^{regex}$", re.IGNORECASE)
+
+
+def card_folders(src_dir):
+    """
+    Cameras roll over to 101CANON, 102CANON, ... once a folder is full, but
+    source detection only ever picks one leaf. When src_dir sits directly
+    under a DCIM folder, return every sibling with the same naming scheme
+    (sorted); otherwise just [src_dir].
+    """
+    src_dir = os.fspath(src_dir)
+    parent = os.path.dirname(os.path.normpath(src_dir))
+    if os.path.basename(parent).upper() != "DCIM":
+        return [src_dir]
+
+    pattern = _sibling_pattern(os.path.basename(os.path.normpath(src_dir)))
+    folders = []
+    try:
+        with os.scandir(parent) as it:
+            for entry in it:
+                if entry.name.startswith('.') or not pattern.match(entry.name):
+                    continue
+                try:
+                    if entry.is_dir():
+                        folders.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        return [src_dir]
+    return sorted(folders) or [src_dir]
+
+
+def scan_sources(src_dirs):
+    """Combined manifest for several folders, in folder then name order."""
+    manifest = []
+    for src_dir in src_dirs:
+        manifest.extend(scan_directory(src_dir))
+    return manifest
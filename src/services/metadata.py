@@ -0,0 +1,98 @@
+import os
+import stat
+import threading
+
+# What an import lane carries over from the source besides the data:
+#   'all'   -> permissions, timestamps, flags and xattrs (what copy2 did)
+#   'mtime' -> access/modification times only
+#   'none'  -> nothing; the files get the time they were written
+METADATA_POLICIES = ("all", "mtime", "none")
+
+# Flags that would stop the stamped partial from being renamed into place
+_BLOCKING_FLAGS = (
+    getattr(stat, "UF_IMMUTABLE", 0) | getattr(stat, "SF_IMMUTABLE", 0)
+    | getattr(stat, "UF_APPEND", 0) | getattr(stat, "SF_APPEND", 0)
+)
+
+
+class SourceMetadata:
+    """
+    Metadata read from the source on the copy worker, before the source can
+    be deleted (VR lane), so it can be applied after verification without
+    the source.
+    """
+
+    __slots__ = ("st", "xattrs")
+
+    def __init__(self, st, xattrs):
+        self.st = st
+        self.xattrs = xattrs
+
+
+def capture(src_file, policy):
+    """Snapshot what `policy` needs from src_file; None for 'none'."""
+    if policy == "none":
+        return None
+    try:
+        st = os.stat(src_file)
+    except OSError:
+        return None
+    xattrs = {}
+    if policy == "all" and hasattr(os, "listxattr"):
+        try:
+            for name in os.listxattr(src_file):
+                xattrs[name] = os.getxattr(src_file, name)
+        except OSError:
+            # Card filesystems (exFAT/FAT32) have none to give
+            pass
+    return SourceMetadata(st, xattrs)
+
+
+def apply(dst_file, meta, policy):
+    """Apply a captured snapshot to dst_file. Raises OSError on failure."""
+    if meta is None or policy == "none":
+        return
+    st = meta.st
+    if policy == "all":
+        for name, value in meta.xattrs.items():
+            try:
+                os.setxattr(dst_file, name, value)
+            except OSError:
+                # e.g. security.* on a non-root run; the rest still applies
+                pass
+        os.chmod(dst_file, stat.S_IMODE(st.st_mode))
+    # Times after mode and xattrs, which some filesystems count as a
+    # modification; flags last, as an immutable flag would block the rest
+    os.utime(dst_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    if policy == "all" and hasattr(st, "st_flags") and hasattr(os, "chflags"):
+        try:
+            os.chflags(dst_file, st.st_flags & ~_BLOCKING_FLAGS)
+        except OSError:
+            pass
+
+
+class MetadataStage:
+    """
+    Metadata stage of one import lane. Workers stamp each partial just
+    before it is renamed into place, so a file never shows up under its
+    real name with the copy-time mtime, and a file the journal marks done
+    already carries its final times. A failure here is reported but never
+    causes the data to be copied again. Safe to use from pool workers.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy if policy in METADATA_POLICIES else "all"
+        self.failed = []
+        self._lock = threading.Lock()
+
+    def capture(self, src_file):
+        return capture(src_file, self.policy)
+
+    def stamp(self, dst_file, meta):
+        if self.policy == "none" or meta is None:
+            return
+        try:
+            apply(dst_file, meta, self.policy)
+        except OSError as e:
+            with self._lock:
+                self.failed.append((dst_file, e))
@@ -0,0 +1,120 @@
+import time
+import threading
+from collections import deque
+
+
+def format_speed(bytes_per_sec):
+    return f"{bytes_per_sec / (1024 * 1024):.1f} MB/s"
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    if h:
+        return f"{h:d}:{m:02d}:{s:02d}"
+    return f"{m:02d}:{s:02d}"
+
+
+class TransferProgress:
+    """
+    Byte-based progress for one import lane.
+
+    Copy workers call add_bytes() as chunks land and file_done() when a file
+    settles (file_cancelled() when a cancel stopped it). Snapshots are pushed to on_update at most every
+    `interval` seconds (always on file boundaries), so a multi-GB clip keeps
+    the UI moving instead of freezing on one file.
+
+    Snapshot dict keys: files_done, total_files, bytes_done, total_bytes,
+    rate (bytes/s, moving average over `window` seconds), eta (seconds or None).
+    """
+
+    def __init__(self, total_files, total_bytes, on_update=None, interval=0.25, window=5.0):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files_done = 0
+        self.bytes_done = 0
+        self._on_update = on_update
+        self._interval = interval
+        self._window = window
+        self._lock = threading.Lock()
+        self._last_emit = 0.0
+        now = time.monotonic()
+        self._samples = deque([(now, 0)])
+
+    def _prune(self, now):
+        # Keep one sample older than the window so the span never collapses
+        while len(self._samples) > 1 and now - self._samples[1][0] >= self._window:
+            self._samples.popleft()
+
+    def _rate(self, now):
+        self._prune(now)
+        t0, b0 = self._samples[0]
+        dt = now - t0
+        # A cancelled file takes its bytes back; never report a negative rate
+        return max(0.0, (self.bytes_done - b0) / dt) if dt > 0 else 0.0
+
+    def _snapshot(self, now):
+        rate = self._rate(now)
+        remaining = max(0, self.total_bytes - self.bytes_done)
+        if remaining == 0:
+            eta = 0.0
+        elif rate > 0:
+            eta = remaining / rate
+        else:
+            eta = None
+        return {
+            "files_done": self.files_done,
+            "total_files": self.total_files,
+            "bytes_done": self.bytes_done,
+            "total_bytes": self.total_bytes,
+            "rate": rate,
+            "eta": eta,
+        }
+
+    def _maybe_emit(self, force=False):
+        # Caller holds the lock; emitting under it keeps snapshots ordered
+        now = time.monotonic()
+        self._samples.append((now, self.bytes_done))
+        self._prune(now)
+        if not self._on_update:
+            return
+        if force or now - self._last_emit >= self._interval:
+            self._last_emit = now
+            self._on_update(self._snapshot(now))
+
+    def add_bytes(self, n):
+        if n <= 0:
+            return
+        with self._lock:
+            self.bytes_done += n
+            self._maybe_emit()
+
+    def file_done(self, planned_size, bytes_copied):
+        """
+        Settle one file, successful or not. The plan is corrected by the
+        difference, so failed files and files that changed size on the card
+        never leave the bar short of (or past) 100%.
+        """
+        with self._lock:
+            self.total_bytes += bytes_copied - planned_size
+            self.files_done += 1
+            self._maybe_emit(force=True)
+
+    def file_cancelled(self, planned_size, bytes_copied):
+        """
+        Drop a file a cancel stopped: it leaves the byte plan without
+        counting as done, and the bytes it had copied (its partial is
+        deleted) come back out of bytes_done, so a cancelled lane never
+        reads as finished.
+        """
+        with self._lock:
+            self.total_bytes -= planned_size
+            self.bytes_done -= bytes_copied
+            self._maybe_emit(force=True)
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot(time.monotonic())
@@ -0,0 +1,103 @@
+import time
+import threading
+
+MIB = 1024 * 1024
+
+# Waits are sliced so a live rate change or a cancel takes effect quickly
+# even while a lane is sleeping off a large chunk.
+_MAX_SLEEP = 0.25
+
+
+class TokenBucket:
+    """
+    Byte-rate limiter shared by every worker that draws from it.
+
+    rate is in bytes per second; 0 means unlimited. Copies report bytes after
+    each chunk, so consume() charges the chunk first and then sleeps until
+    the bucket is out of debt. That keeps the average at `rate` even when a
+    single chunk is larger than the burst allowance.
+    """
+
+    def __init__(self, rate=0, burst_seconds=1.0):
+        self._lock = threading.Lock()
+        self._burst_seconds = burst_seconds
+        self._rate = 0
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self.set_rate(rate)
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def set_rate(self, rate):
+        """Change the limit; safe to call while copies are running."""
+        with self._lock:
+            self._refill()
+            self._rate = max(0, int(rate or 0))
+            # Forget old debt so raising or lifting the cap is felt at once
+            self._tokens = max(0.0, min(self._tokens, self._burst()))
+
+    def _burst(self):
+        return self._rate * self._burst_seconds
+
+    def _refill(self):
+        now = time.monotonic()
+        if self._rate:
+            self._tokens = min(self._burst(), self._tokens + (now - self._stamp) * self._rate)
+        self._stamp = now
+
+    def consume(self, n, control=None):
+        """Charge n bytes and block until the rate allows more."""
+        with self._lock:
+            if not self._rate:
+                return
+            self._refill()
+            self._tokens -= n
+        while True:
+            with self._lock:
+                if not self._rate:
+                    return
+                self._refill()
+                if self._tokens >= 0:
+                    return
+                wait = -self._tokens / self._rate
+            time.sleep(min(wait, _MAX_SLEEP))
+            if control is not None:
+                control.checkpoint()
+
+
+class BandwidthLimiter:
+    """
+    Per-lane and global caps for one import. Every byte a lane copies is
+    charged to its own bucket and then to the global one, so the global cap
+    bounds the sum of all lanes (e.g. to keep a shared NAS usable for the
+    rest of the office) while a lane cap bounds that lane alone.
+
+    limits: {"global": MB/s, "photo": MB/s, "vr": MB/s}, 0 or missing = no cap.
+    """
+
+    def __init__(self, limits=None):
+        self._buckets = {"global": TokenBucket()}
+        for name, mbps in (limits or {}).items():
+            self.set_limit(name, mbps)
+
+    def _bucket(self, name):
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = self._buckets.setdefault(name, TokenBucket())
+        return bucket
+
+    def set_limit(self, name, mbps):
+        """Set the cap for a lane ('photo', 'vr') or 'global', in MB/s."""
+        self._bucket(name).set_rate(float(mbps or 0) * MIB)
+
+    def limit(self, name):
+        return self._bucket(name).rate / MIB
+
+    def limited(self, kind):
+        return bool(self._bucket(kind).rate or self._buckets["global"].rate)
+
+    def consume(self, kind, n, control=None):
+        self._bucket(kind).consume(n, control)
+        self._buckets["global"].consume(n, control)
@@ -0,0 +1,365 @@
+import os
+import sys
+import errno
+import shutil
+import functools
+
+# Transfer backends selectable through ImportTask task_config["transfer"]:
+#   'auto'   -> kernel-side copy where the platform offers it, shutil otherwise
+#   'kernel' -> os.copy_file_range / os.sendfile, falling back per file
+#   'stream' -> large-buffer userspace copy with fadvise hints + preallocation
+#   'shutil' -> plain shutil.copyfile
+# All of them copy data only, and flush it to disk through their own writable
+# descriptor before returning; metadata is applied separately (see metadata.py).
+BACKENDS = ("auto", "kernel", "stream", "shutil")
+
+MIB = 1024 * 1024
+DEFAULT_BLOCK_SIZE = 16 * MIB
+MIN_BLOCK_SIZE = 4 * MIB
+MAX_BLOCK_SIZE = 64 * MIB
+
+# 'auto' switches to the streaming copier from this size up (VR clips), where
+# keeping the page cache clean matters more than syscall count.
+LARGE_FILE_THRESHOLD = 256 * MIB
+
+# Destination pages are only dropped once written back; flush every N blocks.
+_FLUSH_EVERY_BLOCKS = 8
+
+# Errors meaning "this pair of file descriptors can't do kernel-side copies",
+# as opposed to real I/O failures that must be surfaced.
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+    getattr(errno, "EOPNOTSUPP", errno.EINVAL),
+    getattr(errno, "ENOTSUP", errno.EINVAL),
+}
+
+# Per-call cap for kernel copies; large enough to amortise the syscall, small
+# enough that byte progress keeps flowing during a single large file.
+_KERNEL_CHUNK = 8 * 1024 * 1024
+
+
+def kernel_copy_available():
+    return sys.platform.startswith("linux") and (
+        hasattr(os, "copy_file_range") or hasattr(os, "sendfile")
+    )
+
+
+def _kernel_copy_fd(fd_in, fd_out, size, on_bytes=None):
+    """
+    Copy `size` bytes between two fds without a userspace buffer.
+    Returns the number of bytes copied, which is short of `size` when the
+    kernel can't handle this pair (see _UNSUPPORTED_ERRNOS); the caller
+    finishes the remainder in userspace.
+    """
+    copied = 0
+    use_range = hasattr(os, "copy_file_range")
+    while copied < size:
+        count = min(_KERNEL_CHUNK, size - copied)
+        try:
+            if use_range:
+                n = os.copy_file_range(fd_in, fd_out, count)
+            else:
+                n = os.sendfile(fd_out, fd_in, copied, count)
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            if use_range and not copied and hasattr(os, "sendfile"):
+                use_range = False
+                continue
+            break
+        if n == 0:
+            break
+        copied += n
+        if on_bytes:
+            on_bytes(n)
+    return copied
+
+
+def _copy_fileobj(fsrc, fdst, on_bytes=None, length=1024 * 1024):
+    while True:
+        buf = fsrc.read(length)
+        if not buf:
+            break
+        fdst.write(buf)
+        if on_bytes:
+            on_bytes(len(buf))
+
+
+def copy_kernel(src_file, dst_file, on_bytes=None):
+    with open(src_file, "rb") as fsrc, open(dst_file, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        copied = _kernel_copy_fd(fsrc.fileno(), fdst.fileno(), size, on_bytes)
+        if copied < size:
+            # Unsupported pair, or a file that grew/shrank under us: finish in userspace
+            fsrc.seek(copied)
+            fdst.seek(copied)
+            _copy_fileobj(fsrc, fdst, on_bytes)
+        fdst.flush()
+        _datasync(fdst.fileno())
+
+
+def clamp_block_size(block_size):
+    if not block_size:
+        return DEFAULT_BLOCK_SIZE
+    return max(MIN_BLOCK_SIZE, min(MAX_BLOCK_SIZE, int(block_size)))
+
+
+def _fadvise(fd, offset, length, advice_name):
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, advice)
+    except OSError:
+        pass
+
+
+@functools.lru_cache(maxsize=None)
+def _fallocate_func():
+    # fallocate(2) itself: unlike posix_fallocate, glibc never emulates it
+    # by writing one byte per block where the filesystem has no native
+    # support (NFSv3, many FUSE mounts); it fails with EOPNOTSUPP instead
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = getattr(libc, "fallocate64", None) or libc.fallocate
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64)
+    func.restype = ctypes.c_int
+    return func
+
+
+def _preallocate(fd, size):
+    fallocate = _fallocate_func()
+    if size <= 0 or fallocate is None:
+        return False
+    # Filesystems like exFAT/SMB/NFSv3 may refuse; the copy still works without it
+    return fallocate(fd, 0, 0, size) == 0
+
+
+def _datasync(fd):
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
+def copy_stream(src_file, dst_file, block_size=DEFAULT_BLOCK_SIZE, on_bytes=None):
+    """
+    Sequential copy with one reusable buffer of `block_size` bytes.
+    The source is read with SEQUENTIAL read-ahead, and pages of both files are
+    dropped (DONTNEED) behind the cursor so a multi-GB clip doesn't evict the
+    rest of the page cache.
+    """
+    block_size = clamp_block_size(block_size)
+    with open(src_file, "rb", buffering=0) as fsrc, open(dst_file, "wb", buffering=0) as fdst:
+        fd_in = fsrc.fileno()
+        fd_out = fdst.fileno()
+        size = os.fstat(fd_in).st_size
+        # No point allocating 64 MiB for a 2 MiB sidecar file
+        buf = bytearray(min(block_size, size) or 1)
+        view = memoryview(buf)
+        _fadvise(fd_in, 0, 0, "POSIX_FADV_SEQUENTIAL")
+        preallocated = _preallocate(fd_out, size)
+
+        copied = 0
+        flushed = 0
+        blocks = 0
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            chunk = view[:n]
+            while chunk:
+                written = fdst.write(chunk)
+                chunk = chunk[written:]
+            _fadvise(fd_in, copied, n, "POSIX_FADV_DONTNEED")
+            copied += n
+            if on_bytes:
+                on_bytes(n)
+            blocks += 1
+            if blocks % _FLUSH_EVERY_BLOCKS == 0:
+                _datasync(fd_out)
+                _fadvise(fd_out, flushed, copied - flushed, "POSIX_FADV_DONTNEED")
+                flushed = copied
+
+        if preallocated and copied != size:
+            # Source changed size while copying; don't leave zero padding behind
+            os.ftruncate(fd_out, copied)
+        _datasync(fd_out)
+        _fadvise(fd_out, flushed, 0, "POSIX_FADV_DONTNEED")
+
+
+def copy_shutil(src_file, dst_file, on_bytes=None):
+    shutil.copyfile(src_file, dst_file)
+    # copyfile closes its own handle; the new file is still writable (no
+    # metadata stamped yet), and Windows can only flush a writable handle
+    fd = os.open(dst_file, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        _datasync(fd)
+    finally:
+        os.close(fd)
+    if on_bytes:
+        # shutil has no chunk hook; report the whole file once it lands
+        on_bytes(os.path.getsize(dst_file))
+
+
+PARTIAL_SUFFIX = ".partial"
+
+
+def partial_path(dst_file):
+    """Hidden sibling that receives the data until the copy is committed."""
+    head, tail = os.path.split(dst_file)
+    return os.path.join(head, f".{tail}{PARTIAL_SUFFIX}")
+
+
+def commit_partial(tmp_file, dst_file):
+    """
+    Atomically rename a finished partial into place. The copier has already
+    flushed the data; reopening here to fsync would fail on Windows, where
+    flushing needs write access and a stamped read-only file has none.
+    """
+    os.replace(tmp_file, dst_file)
+
+
+def cleanup_partials(dst_dir):
+    """Remove partials left by an interrupted run. Returns how many went."""
+    removed = 0
+    try:
+        with os.scandir(dst_dir) as it:
+            for entry in it:
+                if entry.name.startswith('.') and entry.name.endswith(PARTIAL_SUFFIX):
+                    try:
+                        os.remove(entry.path)
+                        removed += 1
+                    except OSError:
+                        pass
+    except OSError:
+        pass
+    return removed
+
+
+# What to do when source and destination sit on the same volume:
+#   'auto'     -> move for lanes that drop the source, reflink (falling back
+#                 to copy) for lanes that keep it
+#   'copy'     -> always copy the data
+#   'move'     -> rename; the source disappears even on the photo lane
+#   'hardlink' -> second name for the same inode, copy if unsupported
+#   'reflink'  -> copy-on-write clone (btrfs/XFS FICLONE, APFS clonefile),
+#                 copy if unsupported
+#   'clone'    -> reflink, else hardlink, else copy (snapshot imports)
+SAME_VOLUME_POLICIES = ("auto", "copy", "move", "hardlink", "reflink", "clone")
+
+# Linux _IOW(0x94, 9, int); fcntl only exposes the name from Python 3.12.
+_FICLONE = 0x40049409
+
+_LINK_UNSUPPORTED_ERRNOS = _UNSUPPORTED_ERRNOS | {errno.ENOTTY, errno.EPERM, errno.EMLINK}
+
+
+def _clonefile_func():
+    if sys.platform != "darwin":
+        return None
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = libc.clonefile
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32)
+    func.restype = ctypes.c_int
+    return func
+
+
+def reflink(src_file, dst_file):
+    """
+    Clone src_file to dst_file sharing its data blocks. Raises OSError
+    (ENOTSUP etc.) where the filesystem can't do it; dst_file must not exist.
+    """
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(src_file, "rb") as fsrc, open(dst_file, "xb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), getattr(fcntl, "FICLONE", _FICLONE), fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.remove(dst_file)
+                raise
+        return
+    clonefile = _clonefile_func()
+    if clonefile is None:
+        raise OSError(errno.ENOTSUP, "reflink not supported on this platform", src_file)
+    import ctypes
+    if clonefile(os.fsencode(src_file), os.fsencode(dst_file), 0) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), src_file)
+
+
+class SameVolumePlacer:
+    """
+    Carries out a same-volume policy for one import lane. place() returns
+    the operation used ('move', 'hardlink', 'reflink'), or None when the
+    caller should copy. An operation the filesystem turns down once is not
+    tried again for the rest of the lane, so an unsupported reflink costs
+    one failed ioctl, not one per file.
+    """
+
+    def __init__(self, policy, keeps_source):
+        if policy not in SAME_VOLUME_POLICIES:
+            policy = "auto"
+        if policy == "auto":
+            policy = "reflink" if keeps_source else "move"
+        self.policy = policy
+        if policy == "copy":
+            self._ops = []
+        elif policy == "clone":
+            self._ops = ["reflink", "hardlink"]
+        else:
+            self._ops = [policy]
+        self._unsupported = set()
+
+    def place(self, src_file, dst_file, before_commit=None):
+        """before_commit(tmp_file), if given, runs on a clone before it is renamed into place."""
+        for op in self._ops:
+            if op in self._unsupported:
+                continue
+            try:
+                if op == "move":
+                    os.rename(src_file, dst_file)
+                elif op == "hardlink":
+                    os.link(src_file, dst_file)
+                else:
+                    # Cloned into a partial like any copy, so the real name
+                    # never shows up as an empty file
+                    tmp_file = partial_path(dst_file)
+                    reflink(src_file, tmp_file)
+                    if before_commit is not None:
+                        before_commit(tmp_file)
+                    os.replace(tmp_file, dst_file)
+            except OSError as e:
+                if op == "move" or e.errno not in _LINK_UNSUPPORTED_ERRNOS:
+                    raise
+                self._unsupported.add(op)
+                continue
+            return op
+        return None
+
+
+def copy_file(src_file, dst_file, backend="auto", block_size=DEFAULT_BLOCK_SIZE, on_bytes=None):
+    """
+    on_bytes: optional func(n) called from the copying thread as each chunk
+    of n bytes is written.
+    """
+    if backend == "auto":
+        if os.path.getsize(src_file) >= LARGE_FILE_THRESHOLD:
+            backend = "stream"
+        else:
+            backend = "kernel" if kernel_copy_available() else "shutil"
+    if backend == "kernel" and kernel_copy_available():
+        copy_kernel(src_file, dst_file, on_bytes)
+    elif backend == "stream":
+        copy_stream(src_file, dst_file, block_size, on_bytes)
+    else:
+        copy_shutil(src_file, dst_file, on_bytes)
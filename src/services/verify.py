@@ -0,0 +1,157 @@
+import os
+import sys
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from src.services.dedup_index import full_hash
+
+# Multiple of any sector size, as unbuffered Windows reads require
+_READ_BLOCK = 1024 * 1024
+
+
+def _drop_cache(path):
+    """
+    Linux: flush and evict a freshly written file from the page cache, so
+    the verification hash reads what actually reached the disk rather than
+    the bytes we just wrote from memory. False where posix_fadvise is
+    missing or refused.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+
+def _darwin_invalidate(fd, size):
+    # macOS has no DONTNEED: map the file and msync(MS_INVALIDATE) to push
+    # its pages out of the unified buffer cache
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    libc.mmap.restype = ctypes.c_void_p
+    libc.mmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int64)
+    libc.msync.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int)
+    libc.munmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+    prot_read, map_shared, ms_invalidate = 0x1, 0x1, 0x2
+    addr = libc.mmap(None, size, prot_read, map_shared, fd, 0)
+    if addr is None or addr == ctypes.c_void_p(-1).value:
+        return False
+    try:
+        return libc.msync(addr, size, ms_invalidate) == 0
+    finally:
+        libc.munmap(addr, size)
+
+
+def _hash_darwin(path):
+    """Hash read around the cache, or None if the cache can't be bypassed."""
+    import fcntl
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        try:
+            # Plain fsync stops at the drive's write cache on macOS
+            fcntl.fcntl(fd, getattr(fcntl, "F_FULLFSYNC", 51))
+        except OSError:
+            os.fsync(fd)
+        size = os.fstat(fd).st_size
+        try:
+            if size and not _darwin_invalidate(fd, size):
+                return None
+            fcntl.fcntl(fd, getattr(fcntl, "F_NOCACHE", 48), 1)
+        except (OSError, AttributeError):
+            return None
+        h = hashlib.blake2b()
+        while True:
+            buf = os.read(fd, _READ_BLOCK)
+            if not buf:
+                break
+            h.update(buf)
+        return h.hexdigest()
+    finally:
+        os.close(fd)
+
+
+def _hash_windows(path):
+    """
+    Hash read with FILE_FLAG_NO_BUFFERING (NTFS/exFAT flush dirty cached
+    pages before a non-cached read), or None if the file can't be opened
+    that way.
+    """
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+    kernel32.CreateFileW.argtypes = (wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                                     wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE)
+    kernel32.ReadFile.argtypes = (wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD,
+                                  ctypes.POINTER(wintypes.DWORD), wintypes.LPVOID)
+    kernel32.VirtualAlloc.restype = wintypes.LPVOID
+    kernel32.VirtualAlloc.argtypes = (wintypes.LPVOID, ctypes.c_size_t, wintypes.DWORD, wintypes.DWORD)
+    kernel32.VirtualFree.argtypes = (wintypes.LPVOID, ctypes.c_size_t, wintypes.DWORD)
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+
+    generic_read, share_read_write, open_existing = 0x80000000, 0x1 | 0x2, 3
+    no_buffering, sequential_scan = 0x20000000, 0x08000000
+    handle = kernel32.CreateFileW(path, generic_read, share_read_write, None, open_existing,
+                                  no_buffering | sequential_scan, None)
+    if handle is None or handle == wintypes.HANDLE(-1).value:
+        return None
+    # Non-cached reads need a sector-aligned buffer; VirtualAlloc is page-aligned
+    buf = kernel32.VirtualAlloc(None, _READ_BLOCK, 0x1000 | 0x2000, 0x04)
+    if not buf:
+        kernel32.CloseHandle(handle)
+        return None
+    try:
+        h = hashlib.blake2b()
+        read = wintypes.DWORD()
+        while True:
+            if not kernel32.ReadFile(handle, buf, _READ_BLOCK, ctypes.byref(read), None):
+                raise ctypes.WinError(ctypes.get_last_error())
+            if not read.value:
+                break
+            h.update(ctypes.string_at(buf, read.value))
+        return h.hexdigest()
+    finally:
+        kernel32.VirtualFree(buf, 0, 0x8000)
+        kernel32.CloseHandle(handle)
+
+
+def _hash_destination(dst_file):
+    """
+    (hash, from_disk). from_disk is False when the platform offered no way
+    around the page cache, i.e. the hash may have been read from memory.
+    A read error is raised, never papered over with a cached read.
+    """
+    content_hash = None
+    if sys.platform == "win32":
+        content_hash = _hash_windows(dst_file)
+    elif sys.platform == "darwin":
+        content_hash = _hash_darwin(dst_file)
+    elif _drop_cache(dst_file):
+        return full_hash(dst_file), True
+    if content_hash is not None:
+        return content_hash, True
+    return full_hash(dst_file), False
+
+
+def verify_copy(src_file, dst_file):
+    """
+    Hash source and destination at the same time (they normally sit on
+    different devices, so the reads don't compete) and compare.
+    Returns (ok, content_hash, from_disk); the hash uses the same algorithm
+    as the dedup index so it can be stored there directly, and from_disk
+    says whether the destination was read back from the disk rather than
+    from the page cache (see _hash_destination).
+    """
+    with ThreadPoolExecutor(max_workers=1) as side:
+        dst_future = side.submit(_hash_destination, dst_file)
+        src_hash = full_hash(src_file)
+        dst_hash, from_disk = dst_future.result()
+    return src_hash == dst_hash, src_hash, from_disk
@@ -4,21 +4,21 @@ import shutil
 import platform
 import math
 import random
-from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
 
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, 
     QLabel, QLineEdit, QPushButton, QProgressBar, QFileDialog, 
-    QMessageBox, QGroupBox, QFrame, QApplication, QComboBox, QGraphicsDropShadowEffect
+    QMessageBox, QGroupBox, QFrame, QApplication, QComboBox, QGraphicsDropShadowEffect, QSpinBox
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QTimer, QRectF
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal, QSize, QTimer, QRectF
 from PyQt6.QtGui import QFont, QIcon, QColor, QPalette, QAction, QPainter, QPen, QLinearGradient, QBrush, QRadialGradient
 
 from src.utils.config import Config
 from src.utils.fs_utils import get_date_based_dirs, resource_path
 from src.services.folder_service import FolderService
-from src.services.import_service import ImportTask
+from src.services.import_control import ImportControl
+from src.services.device_monitor import DeviceMonitor
+from src.services.progress import format_speed, format_eta
 from src.ui.styles import get_stylesheet, THEMES
 from src.ui.highlighter import FolderHighlighter
 
@@ -216,9 +216,15 @@ class CRTEffectOverlay(QWidget):
         painter.end()
 
 
+class DeviceStatusBridge(QObject):
+    # Carries DeviceMonitor status dicts from its thread to the UI thread
+    changed = pyqtSignal(dict)
+
+
 class ImportWorker(QThread):
-    progress_photo = pyqtSignal(int, int, str)
-    progress_vr = pyqtSignal(int, int, str)
+    # Payload is a TransferProgress snapshot dict (bytes, rate, eta)
+    progress_photo = pyqtSignal(dict)
+    progress_vr = pyqtSignal(dict)
     status = pyqtSignal(str)
     finished = pyqtSignal(list)
 
@@ -228,54 +234,36 @@ class ImportWorker(QThread):
         self.vr_src = vr_src
         self.photo_dst = photo_dst
         self.vr_dst = vr_dst
+        # The import stack is only loaded once somebody imports, not at startup
+        from src.services.throttle import BandwidthLimiter
+        self.control = ImportControl()
+        # Shared by both lanes; the UI adjusts it live while copies run
+        self.limiter = BandwidthLimiter(Config.get_import_bandwidth())
 
     def run(self):
-        # Concurrency Implementation
-        
-        # Photo Task Wrapper
-        def run_photo_task():
-            def on_photo_progress(curr, total, speed):
-                self.progress_photo.emit(curr, total, speed)
-            
-            photo_task = ImportTask({
-                'on_progress': on_photo_progress,
-                'on_status_change': lambda msg: self.status.emit(f"相片: {msg}")
-            })
-            
-            return photo_task.run({
-                "src": str(self.photo_src),
-                "dst": str(self.photo_dst),
-                "kind": "photo",
-                "label": "相片"
-            })
-
-        # VR Task Wrapper
-        def run_vr_task():
-            def on_vr_progress(curr, total, speed):
-                self.progress_vr.emit(curr, total, speed)
-                
-            vr_task = ImportTask({
-                'on_progress': on_vr_progress,
-                'on_status_change': lambda msg: self.status.emit(f"VR: {msg}")
-            })
-            
-            return vr_task.run({
-                "src": str(self.vr_src),
-                "dst": str(self.vr_dst),
-                "kind": "vr",
-                "label": "VR"
-            })
-
-        results = []
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            future_photo = executor.submit(run_photo_task)
-            future_vr = executor.submit(run_vr_task)
-            
-            # Wait for both to complete
-            results.append(future_photo.result())
-            results.append(future_vr.result())
-        
-        self.finished.emit(results)
+        import asyncio
+        from src.services.async_import import card_import_lanes
+        lanes = card_import_lanes(
+            self.photo_src, self.vr_src, self.photo_dst, self.vr_dst,
+            control=self.control, limiter=self.limiter,
+        )
+        # Both lanes run as coroutines on this thread's event loop
+        self.finished.emit(asyncio.run(self._run_lanes(lanes)))
+
+    async def _run_lanes(self, lanes):
+        from src.services.async_import import AsyncImportService
+        results = {}
+        progress = {"photo": self.progress_photo, "vr": self.progress_vr}
+        status_prefix = {"photo": "相片", "vr": "VR"}
+        async with AsyncImportService() as service:
+            async for event in service.stream(lanes):
+                if event.type == "bytes":
+                    progress[event.lane].emit(event.data)
+                elif event.type == "status":
+                    self.status.emit(f"{status_prefix[event.lane]}: {event.data}")
+                elif event.type == "finished":
+                    results[event.lane] = event.data
+        return [results["photo"], results["vr"]]
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -285,31 +273,44 @@ class MainWindow(QMainWindow):
         self.resize(1280, 1100)
         self.setMinimumSize(1200, 1000)
         
-        # Device Monitor Timer
-        self.device_timer = QTimer(self)
-        self.device_timer.timeout.connect(self.check_devices)
-        self.device_timer.start(2000) # Check every 2 seconds
         self._hud_phase = 0
         self._device_state_text = "SCANNING DEVICES"
-        self.hud_timer = QTimer(self)
-        self.hud_timer.timeout.connect(self.tick_hud)
-        self.hud_timer.start(140)
+        # Glow effects and the CRT overlay wait until the window is on screen
+        self._effects_ready = False
         
         # Load theme preference or default
         self.current_theme = Config.get("theme", "Dracula (Official) - 德古拉(官方)")
         
         self.init_ui()
         
-        # Initialize Global CRT Overlay
-        self.crt_overlay = CRTEffectOverlay(self)
-        self.crt_overlay.raise_()
-        
         self.apply_theme(self.current_theme)
         self.load_settings()
         
-        # Initial check
-        self.check_devices()
         QTimer.singleShot(0, self.ensure_default_geometry)
+        # Runs on the first event loop pass, after the window has been shown
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Deferred part of startup: effects, timers and the first device check."""
+        # Initialize Global CRT Overlay
+        self.crt_overlay = CRTEffectOverlay(self)
+        self.crt_overlay.resize(self.size())
+        self.crt_overlay.show()
+        self.crt_overlay.raise_()
+        self._effects_ready = True
+        self.apply_cinematic_effects()
+        self.sync_console_palette()
+
+        self.hud_timer = QTimer(self)
+        self.hud_timer.timeout.connect(self.tick_hud)
+        self.hud_timer.start(140)
+
+        # Device Monitor: scans run on its own thread, status arrives through
+        # a queued signal only when a card comes or goes
+        self.device_bridge = DeviceStatusBridge(self)
+        self.device_bridge.changed.connect(self.update_device_status)
+        self.device_monitor = DeviceMonitor(self.device_bridge.changed.emit)
+        self.device_monitor.start()
 
     def init_ui(self):
         central_widget = QWidget()
@@ -477,6 +478,28 @@ class MainWindow(QMainWindow):
         self.prog_vr.setFormat("%p%")
         h_vr.addWidget(self.prog_vr)
         progress_layout.addLayout(h_vr)
+
+        # Import controls (only enabled while an import is running)
+        h_ctrl = QHBoxLayout()
+        h_ctrl.addWidget(QLabel("总限速:"))
+        self.spin_bandwidth = QSpinBox()
+        self.spin_bandwidth.setRange(0, 10000)
+        self.spin_bandwidth.setSuffix(" MB/s")
+        self.spin_bandwidth.setSpecialValueText("不限速")
+        self.spin_bandwidth.setToolTip("导入总带宽上限 (相片 + VR)，导入进行中也可调整")
+        self.spin_bandwidth.setValue(int(Config.get_import_bandwidth()["global"]))
+        self.spin_bandwidth.valueChanged.connect(self.change_bandwidth_limit)
+        h_ctrl.addWidget(self.spin_bandwidth)
+        h_ctrl.addStretch()
+        self.btn_pause = QPushButton("⏸ 暂停")
+        self.btn_pause.setEnabled(False)
+        self.btn_pause.clicked.connect(self.toggle_import_pause)
+        h_ctrl.addWidget(self.btn_pause)
+        self.btn_cancel = QPushButton("⏹ 取消导入")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_import)
+        h_ctrl.addWidget(self.btn_cancel)
+        progress_layout.addLayout(h_ctrl)
         
         main_layout.addLayout(progress_layout)
 
@@ -521,7 +544,6 @@ class MainWindow(QMainWindow):
         
         # self.status_bar.showMessage("就绪") # Remove this as requested
         
-        self.apply_cinematic_effects()
         self.sync_console_palette()
 
     def ensure_default_geometry(self):
@@ -544,7 +566,8 @@ class MainWindow(QMainWindow):
 
     def apply_theme(self, theme_name):
         self.setStyleSheet(get_stylesheet(theme_name))
-        self.apply_cinematic_effects()
+        if self._effects_ready:
+            self.apply_cinematic_effects()
         self.sync_console_palette()
 
     def sync_console_palette(self):
@@ -569,74 +592,12 @@ class MainWindow(QMainWindow):
             glow.setOffset(0, 0)
             widget.setGraphicsEffect(glow)
 
-    def check_devices(self):
-        p_src = Config.get_photo_src()
-        v_src = Config.get_vr_src()
-        
-        p_ok = os.path.exists(str(p_src))
-        v_ok = os.path.exists(str(v_src))
-        
-        # 提取设备名称逻辑
-        def get_device_name(path_str):
-            if not path_str or not os.path.exists(path_str):
-                return ""
-            
-            drive_name = ""
-            
-            # 1. 尝试获取卷标
-            if platform.system() == 'Windows':
-                drive = os.path.splitdrive(path_str)[0]
-                if drive:
-                    try:
-                        import win32api
-                        vol_info = win32api.GetVolumeInformation(drive + "\\")
-                        if vol_info[0]:
-                            drive_name = vol_info[0]
-                    except:
-                        pass
-                    if not drive_name:
-                        drive_name = drive
-            elif platform.system() == 'Darwin':
-                if path_str.startswith('/Volumes/'):
-                    parts = Path(path_str).parts
-                    if len(parts) >= 3:
-                        drive_name = parts[2]
-            
-            # 2. 如果卷标是 Untitled 或为空，尝试读取 EXIF
-            is_generic = not drive_name or drive_name.lower() in ['untitled', 'no name', 'disk']
-            
-            if is_generic:
-                try:
-                    from PIL import Image
-                    from PIL.ExifTags import TAGS
-                    
-                    # 扫描目录下前3个文件寻找图片
-                    for root, dirs, files in os.walk(path_str):
-                        for f in files:
-                            if f.lower().endswith(('.jpg', '.jpeg', '.arw', '.dng')):
-                                full_path = os.path.join(root, f)
-                                try:
-                                    img = Image.open(full_path)
-                                    exif = img.getexif()
-                                    if exif:
-                                        for tag_id, value in exif.items():
-                                            tag = TAGS.get(tag_id, tag_id)
-                                            if tag == 'Model':
-                                                # Clean up model string (remove null bytes, non-printable chars)
-                                                raw_model = str(value).strip()
-                                                clean_model = "".join(c for c in raw_model if c.isprintable())
-                                                return f"[{clean_model}]"
-                                except:
-                                    continue
-                        # 只扫描顶层或一层子目录，避免太慢
-                        break
-                except ImportError:
-                    pass
-            
-            return f"[{drive_name}]" if drive_name else ""
-
-        p_name = get_device_name(str(p_src))
-        v_name = get_device_name(str(v_src))
+    def update_device_status(self, status):
+        """Render a DeviceMonitor status; no filesystem access here."""
+        p_ok = status["photo"]["online"]
+        v_ok = status["vr"]["online"]
+        p_name = status["photo"]["name"]
+        v_name = status["vr"]["name"]
         
         # Dual-line status format
         line1 = ""
@@ -739,29 +700,33 @@ class MainWindow(QMainWindow):
                 }}
             """)
 
-    def update_photo_progress(self, curr, total, speed):
-        self.prog_photo.setMaximum(total)
-        self.prog_photo.setValue(curr)
-        
-        # Set text with speed
+    def render_transfer_progress(self, bar, snap):
+        # QProgressBar is int32-bound, so bytes are mapped onto 0..1000
+        curr, total = snap["files_done"], snap["total_files"]
+        total_bytes = snap["total_bytes"]
+        value = int(snap["bytes_done"] * 1000 / total_bytes) if total_bytes > 0 else 0
         if curr >= total and total > 0:
-             self.prog_photo.setFormat(f"✅ 完成 ({curr}/{total}) {speed}")
+            value = 1000
+        value = max(0, min(1000, value))
+        bar.setMaximum(1000)
+        bar.setValue(value)
+
+        speed = format_speed(snap["rate"])
+        worker = getattr(self, 'worker', None)
+        if worker is not None and worker.control.cancelled:
+             bar.setFormat(f"⏹ 已取消 ({curr}/{total})")
+        elif curr >= total and total > 0:
+             bar.setFormat(f"✅ 完成 ({curr}/{total}) {speed}")
         else:
-             self.prog_photo.setFormat(f"%p% ({curr}/{total}) {speed}")
-             
-        self.update_progress_style(self.prog_photo, curr, total)
+             bar.setFormat(f"%p% ({curr}/{total}) {speed} 剩余 {format_eta(snap['eta'])}")
 
-    def update_vr_progress(self, curr, total, speed):
-        self.prog_vr.setMaximum(total)
-        self.prog_vr.setValue(curr)
-        
-        # Set text with speed
-        if curr >= total and total > 0:
-             self.prog_vr.setFormat(f"✅ 完成 ({curr}/{total}) {speed}")
-        else:
-             self.prog_vr.setFormat(f"%p% ({curr}/{total}) {speed}")
-             
-        self.update_progress_style(self.prog_vr, curr, total)
+        self.update_progress_style(bar, value, 1000)
+
+    def update_photo_progress(self, snap):
+        self.render_transfer_progress(self.prog_photo, snap)
+
+    def update_vr_progress(self, snap):
+        self.render_transfer_progress(self.prog_vr, snap)
 
     # ... (Rest of the methods remain unchanged: load_settings, save_settings, etc.)
     
@@ -871,6 +836,8 @@ class MainWindow(QMainWindow):
             if val:
                 Config.set(key, val)
         self.load_settings()
+        if hasattr(self, 'device_monitor'):
+            self.device_monitor.refresh()
         dialog.accept()
 
     def create_folders(self):
@@ -922,6 +889,9 @@ class MainWindow(QMainWindow):
         photo_dst, vr_dst = targets[0], targets[1]
         
         self.btn_import.setEnabled(False)
+        self.btn_pause.setEnabled(True)
+        self.btn_pause.setText("⏸ 暂停")
+        self.btn_cancel.setEnabled(True)
         self.worker = ImportWorker(p_src, v_src, photo_dst, vr_dst)
         self.worker.progress_photo.connect(self.update_photo_progress)
         self.worker.progress_vr.connect(self.update_vr_progress)
@@ -929,15 +899,75 @@ class MainWindow(QMainWindow):
         self.worker.finished.connect(self.on_import_finished)
         self.worker.start()
 
+    def toggle_import_pause(self):
+        worker = getattr(self, 'worker', None)
+        if not worker or not worker.isRunning():
+            return
+        if worker.control.paused:
+            worker.control.resume()
+            self.btn_pause.setText("⏸ 暂停")
+            self.status_bar.showMessage("导入继续")
+        else:
+            worker.control.pause()
+            self.btn_pause.setText("▶ 继续")
+            self.status_bar.showMessage("导入已暂停")
+
+    def change_bandwidth_limit(self, mbps):
+        limits = Config.get("import_bandwidth_mbps")
+        limits = dict(limits) if isinstance(limits, dict) else {}
+        limits["global"] = mbps
+        Config.set("import_bandwidth_mbps", limits)
+        worker = getattr(self, 'worker', None)
+        if worker and worker.isRunning():
+            worker.limiter.set_limit("global", mbps)
+            self.status_bar.showMessage(f"导入限速: {mbps} MB/s" if mbps else "导入限速: 不限速")
+
+    def cancel_import(self):
+        worker = getattr(self, 'worker', None)
+        if not worker or not worker.isRunning():
+            return
+        worker.control.cancel()
+        self.btn_pause.setEnabled(False)
+        self.btn_cancel.setEnabled(False)
+        self.status_bar.showMessage("正在取消导入...")
+
+    def closeEvent(self, event):
+        if hasattr(self, 'device_monitor'):
+            self.device_monitor.stop()
+        # Stop copies at the next chunk instead of blocking on a large clip
+        worker = getattr(self, 'worker', None)
+        if worker and worker.isRunning():
+            worker.control.cancel()
+            worker.wait()
+        super().closeEvent(event)
+
     def on_import_finished(self, results):
         self.btn_import.setEnabled(True)
+        self.btn_pause.setEnabled(False)
+        self.btn_pause.setText("⏸ 暂停")
+        self.btn_cancel.setEnabled(False)
+        if self.worker.control.cancelled:
+            total_moved = sum(r[2] for r in results)
+            QMessageBox.information(self, "已取消", f"导入已取消。\n已完成文件: {total_moved}\n下次导入将从中断处继续。")
+            self.status_bar.showMessage("就绪")
+            return
         total_moved = sum(r[2] for r in results) 
+        total_duplicates = sum(r[6] for r in results)
         errors = []
         for r in results:
             if r[1]: 
                 errors.extend(r[1])
         
         msg = f"导入完成。\n总计移动文件: {total_moved}"
+        if total_duplicates:
+            msg += f"\n跳过重复文件: {total_duplicates}"
+        if any(r[7]["enabled"] for r in results):
+            verified = sum(r[7]["verified"] for r in results)
+            failed = sum(r[7]["failed"] for r in results)
+            msg += f"\n校验通过: {verified}，校验失败: {failed}"
+            cached = sum(r[7].get("cached", 0) for r in results)
+            if cached:
+                msg += f"\n其中 {cached} 个仅为缓存级校验 (无法绕过系统缓存回读)"
         if errors:
             msg += f"\n异常数量: {len(errors)} (详情见日志)"
             QMessageBox.warning(self, "完成但有错误", msg + "\n" + "\n".join(errors[:5]))
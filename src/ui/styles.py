@@ -1,4 +1,4 @@
-from PyQt6.QtGui import QColor
+from functools import lru_cache
 
 class ThemeColors:
     def __init__(self, bg, current, fg, comment, cyan, green, orange, pink, purple, red, yellow):
@@ -56,6 +56,8 @@ THEMES = {
     )
 }
 
+# Built on first use per theme; switching back and forth reuses the string
+@lru_cache(maxsize=None)
 def get_stylesheet(theme_name="Dracula (Official) - 德古拉(官方)"):
     t = THEMES.get(theme_name, THEMES["Dracula (Official) - 德古拉(官方)"])
     
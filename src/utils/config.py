@@ -2,6 +2,7 @@ import os
 import json
 import platform
 from pathlib import Path
+from src.utils.volume_index import VolumeIndex
 
 class Config:
     PRICE_PER_SHOOT = 28
@@ -84,60 +85,19 @@ class Config:
             
         return default
 
+    # Shared by get_photo_src and get_vr_src; rebuilt on mount changes only
+    _volume_index = VolumeIndex()
+
     @classmethod
     def _scan_for_folder(cls, candidates, volume_filter=None):
         """
         Scan mounted volumes for specific folder structures.
         volume_filter: optional function(volume_name) -> bool to pre-filter volumes
         """
-        system = platform.system()
-        found_path = None
-        
-        if system == 'Darwin':
-            volumes_dir = "/Volumes"
-            if not os.path.exists(volumes_dir):
-                return None
-            try:
-                # List all volumes
-                volumes = [os.path.join(volumes_dir, v) for v in os.listdir(volumes_dir) if not v.startswith('.')]
-                
-                # Sort volumes to ensure deterministic order (maybe prioritizing non-Macintosh HD?)
-                # Usually external drives are what we want. "Macintosh HD" usually shouldn't have DCIM at root level accessible easily?
-                # But we check specific paths.
-                
-                for vol in volumes:
-                    if volume_filter and not volume_filter(os.path.basename(vol)):
-                        continue
-                        
-                    for cand in candidates:
-                        target = os.path.join(vol, cand)
-                        if os.path.exists(target):
-                            return Path(target)
-            except Exception:
-                pass
-                
-        elif system == 'Windows':
-            import string
-            drives = []
-            try:
-                import win32api
-                drives = win32api.GetLogicalDriveStrings()
-                drives = drives.split('\000')[:-1]
-            except:
-                drives = [f"{d}:\\" for d in string.ascii_uppercase if os.path.exists(f"{d}:")]
-            
-            for drive in drives:
-                # Drive is like "C:\"
-                if volume_filter:
-                    # Getting volume label on Windows is harder here without extra calls, ignore filter for now or implement if needed
-                    pass
-
-                for cand in candidates:
-                    target = os.path.join(drive, cand)
-                    if os.path.exists(target):
-                        return Path(target)
-                        
-        return None
+        try:
+            return cls._volume_index.find(candidates, volume_filter)
+        except Exception:
+            return None
 
     @classmethod
     def get_photo_src(cls):
@@ -186,3 +146,71 @@ class Config:
     @classmethod
     def get_photographer_name(cls):
         return cls.get("photographer_name", "")
+
+    # Copy workers per import lane. Card readers choke on deep queues, local
+    # SSD/NVMe staging folders benefit from more requests in flight.
+    DEFAULT_IMPORT_WORKERS = {"card": 4, "local": 8}
+
+    @classmethod
+    def get_import_workers(cls, src_dir):
+        """Number of parallel copy workers for an import source."""
+        workers = dict(cls.DEFAULT_IMPORT_WORKERS)
+        custom = cls.get("import_workers")
+        if isinstance(custom, dict):
+            workers.update({k: v for k, v in custom.items() if isinstance(v, int) and v > 0})
+
+        # Anything living on the same device as the home directory is treated
+        # as local storage; everything else is assumed to be a card reader.
+        try:
+            home_dev = os.stat(os.path.expanduser("~")).st_dev
+            is_local = os.stat(src_dir).st_dev == home_dev
+        except OSError:
+            is_local = False
+        return workers["local"] if is_local else workers["card"]
+
+    @classmethod
+    def get_import_block_size(cls):
+        """Streaming copy buffer in bytes (import_block_size_mb, default 16)."""
+        try:
+            mb = int(cls.get("import_block_size_mb", 16))
+        except (TypeError, ValueError):
+            mb = 16
+        return mb * 1024 * 1024
+
+    @classmethod
+    def get_import_bandwidth(cls):
+        """
+        Bandwidth caps in MB/s from the import_bandwidth_mbps setting, e.g.
+        {"global": 40, "photo": 0, "vr": 20}. 0 or missing means unlimited.
+        """
+        limits = {"global": 0, "photo": 0, "vr": 0}
+        custom = cls.get("import_bandwidth_mbps")
+        if isinstance(custom, dict):
+            for key, value in custom.items():
+                if isinstance(value, (int, float)) and value >= 0:
+                    limits[key] = value
+        return limits
+
+    @classmethod
+    def get_same_volume_policy(cls, kind):
+        """
+        What an import lane does when source and destination share a volume
+        (import_same_volume_policy, e.g. {"photo": "reflink", "vr": "move"}).
+        See transfer.SAME_VOLUME_POLICIES; defaults to 'auto'.
+        """
+        custom = cls.get("import_same_volume_policy")
+        if isinstance(custom, dict) and isinstance(custom.get(kind), str):
+            return custom[kind]
+        return "auto"
+
+    @classmethod
+    def get_metadata_policy(cls, kind):
+        """
+        What an import lane preserves besides the data
+        (import_metadata_policy, e.g. {"photo": "mtime", "vr": "none"}).
+        See metadata.METADATA_POLICIES; defaults to 'all', like copy2.
+        """
+        custom = cls.get("import_metadata_policy")
+        if isinstance(custom, dict) and isinstance(custom.get(kind), str):
+            return custom[kind]
+        return "all"
@@ -28,6 +28,41 @@ def resolve_conflict(dst_dir, filename):
         counter += 1
     return dst_file
 
+class ConflictResolver:
+    """
+    resolve_conflict for a whole import session: the destination is listed
+    once, then every name (and its _N suffix) is picked from memory, so a
+    busy MMDD原片 folder on a network drive costs one listing instead of up
+    to 1000 stats per file. Names are compared case-insensitively since the
+    usual targets (APFS, NTFS, SMB) are. Only call from one thread.
+    """
+
+    def __init__(self, dst_dir):
+        self.dst_dir = dst_dir
+        self._taken = set()
+        self._next_suffix = {}
+        try:
+            with os.scandir(dst_dir) as it:
+                for entry in it:
+                    self._taken.add(entry.name.casefold())
+        except OSError:
+            pass
+
+    def resolve(self, filename):
+        """Reserve and return a free destination path for filename."""
+        name = filename
+        key = filename.casefold()
+        if key in self._taken:
+            base, ext = os.path.splitext(filename)
+            counter = self._next_suffix.get(key, 1)
+            name = f"{base}_{counter}{ext}"
+            while name.casefold() in self._taken:
+                counter += 1
+                name = f"{base}_{counter}{ext}"
+            self._next_suffix[key] = counter + 1
+        self._taken.add(name.casefold())
+        return os.path.join(self.dst_dir, name)
+
 def get_date_based_dirs(base_root=None, mode='create', photographer_name="贺志"):
     """
     mode: 'create' (default) -> for generating folders
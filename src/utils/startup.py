@@ -0,0 +1,79 @@
+"""
+Built-in cold-start report, enabled with `python main.py --startup-report`
+or FANGKAN_STARTUP_REPORT=1. Prints startup phases and the slowest module
+imports (in the same layout as `python -X importtime`) to stderr once the
+main window has been painted. Works in PyInstaller builds, where -X flags
+can't be passed.
+"""
+import sys
+import time
+import builtins
+import threading
+
+_T0 = time.perf_counter()
+_enabled = False
+_original_import = None
+_main_thread = threading.get_ident()
+_marks = []
+# (module, self seconds, cumulative seconds, nesting depth)
+_imports = []
+_stack = []
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    """Start timing imports; call as early as possible."""
+    global _enabled, _original_import
+    if _enabled:
+        return
+    _enabled = True
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Only first-time absolute imports on the main thread, like -X importtime
+    if level or name in sys.modules or threading.get_ident() != _main_thread:
+        return _original_import(name, globals, locals, fromlist, level)
+    _stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += elapsed
+        _imports.append((name, elapsed - children, elapsed, len(_stack)))
+
+
+def mark(label):
+    if _enabled:
+        _marks.append((label, time.perf_counter()))
+
+
+def report(top=30, stream=None):
+    """Print the report and stop timing imports."""
+    global _enabled
+    if not _enabled:
+        return
+    builtins.__import__ = _original_import
+    _enabled = False
+    stream = stream or sys.stderr
+
+    stream.write("startup phases (ms since main.py started):\n")
+    previous = _T0
+    for label, at in _marks:
+        stream.write(f"  {(at - _T0) * 1000:8.1f}  (+{(at - previous) * 1000:7.1f})  {label}\n")
+        previous = at
+
+    total = sum(cumulative for _, _, cumulative, depth in _imports if depth == 0)
+    stream.write(f"imports: {len(_imports)} modules, {total * 1000:.1f} ms at top level\n")
+    stream.write("import time: self [us] | cumulative | imported package\n")
+    slowest = sorted(_imports, key=lambda rec: rec[2], reverse=True)[:top]
+    for name, self_time, cumulative, depth in slowest:
+        stream.write(f"import time: {int(self_time * 1e6):9d} | {int(cumulative * 1e6):10d} | {'  ' * depth}{name}\n")
+    stream.flush()
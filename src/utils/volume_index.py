@@ -0,0 +1,269 @@
+import os
+import platform
+import threading
+from pathlib import Path
+
+# Top-level folders of a card that source candidates live under
+INDEXED_ROOTS = ("DCIM", "MP_ROOT")
+
+_DRIVE_REMOTE = 4
+
+# Linux: where desktops (udisks) and kiosk automount rules put cards
+LINUX_MEDIA_DIRS = ("/media", "/run/media", "/mnt")
+# Filesystems that never hold a camera card: kernel/virtual ones, in-memory,
+# image and overlay mounts, and network shares
+_LINUX_IGNORED_FS = {
+    "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs",
+    "devpts", "devtmpfs", "efivarfs", "fusectl", "hugetlbfs", "mqueue", "nsfs",
+    "proc", "pstore", "ramfs", "rpc_pipefs", "securityfs", "selinuxfs", "sysfs",
+    "tmpfs", "tracefs", "overlay", "squashfs", "iso9660", "nfs", "nfs4", "cifs",
+    "smb3", "9p", "fuse.gvfsd-fuse", "fuse.portal", "fuse.sshfs", "fuse.lxcfs",
+}
+_LINUX_SYSTEM_MOUNTS = {"/", "/boot", "/boot/efi", "/efi", "/home", "/usr", "/var", "/opt", "/srv", "/tmp"}
+
+
+def mount_signature():
+    """
+    Cheap token that changes whenever a volume is mounted or unmounted.
+    None when the platform offers nothing better than probing paths.
+    """
+    system = platform.system()
+    if system == 'Linux':
+        try:
+            with open("/proc/self/mountinfo", "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+    if system == 'Darwin':
+        try:
+            return tuple(sorted(os.listdir("/Volumes")))
+        except OSError:
+            return None
+    if system == 'Windows':
+        try:
+            from ctypes import windll
+            # Bitmask of drive letters; no probing of A: to Z:
+            drives = windll.kernel32.GetLogicalDrives()
+        except Exception:
+            return None
+        # Card reader slots keep their letter when the card is swapped, so
+        # the volume serial numbers have to be part of the token; without
+        # them media changes go unseen, so report no signature at all
+        serials = []
+        for drive in _windows_drives(drives):
+            if windll.kernel32.GetDriveTypeW(drive) == _DRIVE_REMOTE:
+                # Same drives mounted_volumes() skips; a disconnected share
+                # can block for seconds
+                continue
+            serial = _windows_volume_serial(drive)
+            if serial is _UNAVAILABLE:
+                return None
+            serials.append(serial)
+        return (drives, tuple(serials))
+    return None
+
+
+def _unescape_mountinfo(field):
+    # Spaces, tabs and backslashes in paths are written as \040 etc.
+    return field.encode("latin-1").decode("unicode_escape").encode("latin-1").decode("utf-8", "replace")
+
+
+def linux_mounts():
+    """
+    Parse /proc/self/mountinfo into
+    {mount_point: (mount_id, "major:minor", fs_type, source)}.
+    """
+    mounts = {}
+    try:
+        with open("/proc/self/mountinfo", "r", encoding="latin-1") as f:
+            lines = f.readlines()
+    except OSError:
+        return mounts
+    for line in lines:
+        left, sep, right = line.partition(" - ")
+        fields = left.split()
+        tail = right.split()
+        if not sep or len(fields) < 5 or len(tail) < 2:
+            continue
+        mounts[_unescape_mountinfo(fields[4])] = (fields[0], fields[2], tail[0], _unescape_mountinfo(tail[1]))
+    return mounts
+
+
+def _linux_removable(source, devno):
+    """True for SD slots, USB readers and other removable block devices."""
+    if source.startswith("/dev/"):
+        # fuseblk (exFAT/NTFS via FUSE) reports 0:N in mountinfo
+        try:
+            rdev = os.stat(source).st_rdev
+            devno = f"{os.major(rdev)}:{os.minor(rdev)}"
+        except OSError:
+            pass
+    device = os.path.realpath(f"/sys/dev/block/{devno}")
+    if not device.startswith("/sys/devices/"):
+        return False
+    if "/usb" in device or "/mmc" in device:
+        return True
+    # The flag lives on the disk, one level above a partition
+    for path in (device, os.path.dirname(device)):
+        try:
+            with open(os.path.join(path, "removable")) as f:
+                if f.read().strip() == "1":
+                    return True
+        except OSError:
+            continue
+    return False
+
+
+def _linux_media_dirs():
+    # Without mountinfo: /media/LABEL, /media/USER/LABEL, /run/media/USER/LABEL
+    found = []
+    for base in LINUX_MEDIA_DIRS:
+        for entry in _subdirs(base):
+            if os.path.ismount(entry.path):
+                found.append(entry.path)
+            else:
+                found.extend(c.path for c in _subdirs(entry.path) if os.path.ismount(c.path))
+    return sorted(found)
+
+
+def linux_volumes():
+    """
+    Mounted filesystems that may be a camera card: real block-device
+    filesystems under LINUX_MEDIA_DIRS, or anywhere else if the device is
+    removable (USB reader, SD slot). Pseudo, network and system mounts are
+    skipped.
+    """
+    mounts = linux_mounts()
+    if not mounts:
+        return _linux_media_dirs()
+    media = tuple(d.rstrip("/") + "/" for d in LINUX_MEDIA_DIRS)
+    volumes = []
+    for mount_point, (_, devno, fs_type, source) in mounts.items():
+        if fs_type in _LINUX_IGNORED_FS or mount_point in _LINUX_SYSTEM_MOUNTS:
+            continue
+        if mount_point.startswith(("/proc/", "/sys/", "/dev/", "/run/user/", "/snap/", "/var/lib/")):
+            continue
+        if mount_point.startswith(media) or _linux_removable(source, devno):
+            volumes.append(mount_point)
+    return sorted(volumes)
+
+
+_UNAVAILABLE = object()
+
+
+def _windows_volume_serial(drive):
+    """Serial number of the volume in drive, None if it holds no media."""
+    try:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    except Exception:
+        return _UNAVAILABLE
+    serial = wintypes.DWORD()
+    # No "There is no disk in the drive" dialog for an empty reader slot
+    old_mode = wintypes.DWORD()
+    sem_failcriticalerrors = 0x0001
+    kernel32.SetThreadErrorMode(sem_failcriticalerrors, ctypes.byref(old_mode))
+    try:
+        ok = kernel32.GetVolumeInformationW(
+            ctypes.c_wchar_p(drive), None, 0, ctypes.byref(serial), None, None, None, 0
+        )
+    finally:
+        kernel32.SetThreadErrorMode(old_mode.value, None)
+    return serial.value if ok else None
+
+
+def _windows_drives(mask=None):
+    if mask is None:
+        from ctypes import windll
+        mask = windll.kernel32.GetLogicalDrives()
+    return [f"{chr(ord('A') + i)}:\\" for i in range(26) if mask & (1 << i)]
+
+
+def mounted_volumes():
+    """Mount points that may hold a camera card, in a stable order."""
+    system = platform.system()
+    if system == 'Darwin':
+        volumes_dir = "/Volumes"
+        try:
+            return [os.path.join(volumes_dir, v) for v in sorted(os.listdir(volumes_dir)) if not v.startswith('.')]
+        except OSError:
+            return []
+    if system == 'Windows':
+        try:
+            from ctypes import windll
+            drives = _windows_drives()
+        except Exception:
+            return []
+        # Mapped network drives never hold a card and are slow to list
+        return [d for d in drives if windll.kernel32.GetDriveTypeW(d) != _DRIVE_REMOTE]
+    if system == 'Linux':
+        return linux_volumes()
+    return []
+
+
+def _subdirs(path):
+    try:
+        with os.scandir(path) as it:
+            return [e for e in it if not e.name.startswith('.') and e.is_dir()]
+    except OSError:
+        return []
+
+
+def index_volume(volume):
+    """
+    {"dcim/100sigma": Path(...), "dcim": Path(...), ...} for one volume:
+    the indexed top-level folders and their direct subfolders, keyed by
+    lower-case relative path (card filesystems ignore case).
+    """
+    index = {}
+    wanted = {name.lower() for name in INDEXED_ROOTS}
+    for top in _subdirs(volume):
+        if top.name.lower() not in wanted:
+            continue
+        index[top.name.lower()] = Path(top.path)
+        for sub in _subdirs(top.path):
+            index[f"{top.name}/{sub.name}".lower()] = Path(sub.path)
+    return index
+
+
+class VolumeIndex:
+    """
+    Folder index of every mounted volume, shared by the photo and VR source
+    lookups. Each volume costs one directory listing of its root and one of
+    each indexed folder; the index is rebuilt only when mount_signature()
+    changes (every time where the platform has no signature).
+    """
+
+    _UNSET = object()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = self._UNSET
+        self._volumes = []  # [(volume, index)]
+
+    def invalidate(self):
+        with self._lock:
+            self._signature = self._UNSET
+
+    def volumes(self):
+        signature = mount_signature()
+        with self._lock:
+            if signature is None or signature != self._signature:
+                self._volumes = [(vol, index_volume(vol)) for vol in mounted_volumes()]
+                self._signature = signature
+            return self._volumes
+
+    def find(self, candidates, volume_filter=None):
+        """
+        First candidate ("DCIM/100SIGMA", ...) present on a volume, volumes
+        in mount order; volume_filter(volume_name) -> bool skips volumes.
+        """
+        keys = [cand.replace("\\", "/").strip("/").lower() for cand in candidates]
+        for volume, index in self.volumes():
+            if volume_filter and not volume_filter(os.path.basename(volume.rstrip("\\/"))):
+                continue
+            for key in keys:
+                if key in index:
+                    return index[key]
+        return None